@@ -1,120 +1,43 @@
 import flet as ft
-from decimal import Decimal
-from dataclasses import dataclass
-from typing import Optional
-import locale
-import math
-from fpdf import FPDF
 import os
+import threading
 from datetime import datetime
+from functools import lru_cache
 
-# Tentativa de configurar locale para formato brasileiro
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except locale.Error:
-    try:
-        locale.setlocale(locale.LC_ALL, 'Portuguese_Brazil.1252')
-    except locale.Error:
-        locale.setlocale(locale.LC_ALL, '')
-
-@dataclass
-class InvestmentResult:
-    interest_amount: float
-    tax_amount: Optional[float] = None
-    tax_percentage: Optional[float] = None
-    iof_amount: Optional[float] = None
-
-class FinanceCalculator:
-    @staticmethod
-    def compound_interest(amount: float, index: float, days: int) -> float:
-        interest = amount * (math.pow(index, days) - 1)
-        return round(interest, 2)
-
-    @staticmethod
-    def get_index_ir(days: int) -> float:
-        if days <= 180:
-            return 22.5
-        elif days <= 360:
-            return 20.0
-        elif days <= 720:
-            return 17.5
-        else:
-            return 15.0
-
-    @staticmethod
-    def get_iof_percentage(days_to_redeem: int) -> float:
-        iof_table = [
-            96, 93, 90, 86, 83, 80, 76, 73, 70, 66, 63, 60, 56, 53, 50, 46,
-            43, 40, 36, 33, 30, 26, 23, 20, 16, 13, 10, 6, 3, 0
-        ]
-        
-        if days_to_redeem <= 30:
-            index = days_to_redeem - 1
-            return iof_table[index]
-        return 0
-
-    @staticmethod
-    def get_iof_amount(days_to_redeem: int, interest_amount: float) -> float:
-        iof_percentage = FinanceCalculator.get_iof_percentage(days_to_redeem)
-        return interest_amount * (iof_percentage / 100)
-
-    @staticmethod
-    def get_index_lcx(yearly_interest: float, di: float) -> float:
-        index = yearly_interest / 100
-        return math.pow((index * di) / 100 + 1, 1 / 365)
-
-    @staticmethod
-    def get_index_poupanca(index: float) -> float:
-        # Correção do cálculo da poupança: 70% da taxa SELIC quando SELIC > 8.5% ao ano
-        # ou 0.5% ao mês + TR quando SELIC <= 8.5%
-        selic_mensal = (index / 100) / 12
-        if index > 8.5:
-            return math.pow((selic_mensal * 0.7) + 1, 1/30)
-        else:
-            return math.pow((0.5/100) + 1, 1/30)  # Simplificado, sem considerar TR
-
-    @staticmethod
-    def calculate_full_months_days(days: int) -> int:
-        days_in_month = 30
-        return 0 if days < days_in_month else math.floor(days / days_in_month) * days_in_month
-
-class InvestmentCalculator:
-    def __init__(self):
-        self.finance = FinanceCalculator()
-
-    def calculate_poupanca(self, amount: float, index: float, days: int) -> dict:
-        full_months_days = self.finance.calculate_full_months_days(days)
-        interest_amount = self.finance.compound_interest(
-            amount,
-            self.finance.get_index_poupanca(index),
-            full_months_days
-        )
-        return {"interest_amount": interest_amount}
+from rendafixa.calculadora import FinanceCalculator, InvestmentResult
+from rendafixa.cache import ResultCache
+from rendafixa.historico import SimulationHistory
+from rendafixa.instrumentacao import instrumentation
+from rendafixa.workers import PoolBusyError, SessionWorkerPool
+from rendafixa.moeda import format_brl, parse_brl
+from rendafixa.taxas import RateSnapshot, carregar_taxas
 
-    def calculate_lcx(self, amount: float, di: float, yearly_index: float, days: int) -> dict:
-        interest_amount = self.finance.compound_interest(
-            amount,
-            self.finance.get_index_lcx(yearly_index, di),
-            days
-        )
-        return {"interest_amount": interest_amount}
+# Módulos que dependem de NumPy, PyArrow e FPDF são importados no primeiro uso, para
+# reduzir o tempo de inicialização da aplicação
 
-    def calculate_cdb(self, amount: float, di: float, yearly_index: float, days: int) -> dict:
-        interest_amount = self.finance.compound_interest(
-            amount,
-            self.finance.get_index_lcx(yearly_index, di),
-            days
-        )
-        tax_percentage = self.finance.get_index_ir(days)
-        iof_amount = self.finance.get_iof_amount(days, interest_amount)
-        tax_amount = (interest_amount - iof_amount) * (tax_percentage / 100)
-        
-        return {
-            "interest_amount": interest_amount,
-            "tax_amount": tax_amount,
-            "tax_percentage": tax_percentage,
-            "iof_amount": iof_amount
-        }
+# Cache de resultados compartilhado entre sessões; a camada em disco é opcional
+result_cache = ResultCache(db_path=os.environ.get("RENDAFIXA_CACHE_DB"))
+
+@lru_cache(maxsize=None)
+def get_history() -> SimulationHistory:
+    # Histórico local de todas as simulações, aberto no primeiro cálculo
+    return SimulationHistory(
+        os.environ.get("RENDAFIXA_HISTORY_DB", os.path.join(os.path.expanduser("~"), ".rendafixa_historico.db"))
+    )
+
+# Pool de cálculo compartilhado pelas sessões web, criado na primeira sessão
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_worker_pool() -> SessionWorkerPool:
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = SessionWorkerPool(
+                max_workers=int(os.environ.get("RENDAFIXA_WORKERS", os.cpu_count() or 4)),
+                max_pending_per_session=int(os.environ.get("RENDAFIXA_SESSION_QUEUE", 4)),
+            )
+        return _worker_pool
 
 def main(page: ft.Page):
     page.title = "Calculadora de Renda Fixa"
@@ -133,7 +56,7 @@ def main(page: ft.Page):
     # Configuração do tema
     page.bgcolor = COLORS['background']
     
-    # Criar o chart_dialog no início da função main
+    # O chart é criado sob demanda por get_chart; o diálogo, por show_chart_dialog
     chart_dialog = None
     chart = None
 
@@ -182,6 +105,21 @@ def main(page: ft.Page):
                         expand=True,
                     ),
                 ]),
+                ft.Text("Evolução do Saldo Bruto", size=16, weight=ft.FontWeight.BOLD),
+                ft.LineChart(
+                    data_series=[
+                        ft.LineChartData(color=COLORS['primary'], stroke_width=2),
+                        ft.LineChartData(color=COLORS['secondary'], stroke_width=2),
+                        ft.LineChartData(color=COLORS['accent'], stroke_width=2),
+                    ],
+                    left_axis=ft.ChartAxis(labels_size=70),
+                    bottom_axis=ft.ChartAxis(title=ft.Text("Dias"), labels_size=30),
+                    horizontal_grid_lines=ft.ChartGridLines(color=ft.colors.GREY_200, width=1),
+                    tooltip_bgcolor=ft.colors.with_opacity(0.9, ft.colors.WHITE),
+                    interactive=True,
+                    height=300,
+                    width=700,
+                ),
             ]),
             padding=20,
             bgcolor=ft.colors.WHITE,
@@ -206,11 +144,20 @@ def main(page: ft.Page):
         bgcolor=COLORS['primary'],
     )
 
-    # Criar o chart no início
-    chart = create_chart()
+    # Entradas e resultados do último cálculo, usados nas exportações
+    ultima_simulacao = {}
+    # Últimos percentuais, aplicados quando o gráfico for criado
+    ultimo_grafico = {}
+
+    def get_chart():
+        # O gráfico só é construído quando exibido pela primeira vez
+        nonlocal chart
+        if chart is None:
+            chart = create_chart()
+            if ultimo_grafico:
+                update_chart(*ultimo_grafico["percentuais"])
+        return chart
 
-    calc = FinanceCalculator()
-    
     # Campos de entrada
     valor_inicial = ft.TextField(
         label="Valor da Aplicação",
@@ -237,6 +184,17 @@ def main(page: ft.Page):
         prefix_icon=ft.Icons.TIMER,
     )
     
+    motor_calculo = ft.Dropdown(
+        label="Motor de cálculo",
+        options=[
+            ft.dropdown.Option("float", "Rápido (float)"),
+            ft.dropdown.Option("decimal", "Exato (Decimal)"),
+            ft.dropdown.Option("verificacao", "Verificação cruzada"),
+        ],
+        value="float",
+        prefix_icon=ft.Icons.PRECISION_MANUFACTURING,
+    )
+    
     taxa_di = ft.TextField(
         label="Taxa DI",
         suffix_text="% ao ano",
@@ -290,7 +248,7 @@ def main(page: ft.Page):
         )
 
     def format_currency(value: float) -> str:
-        return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return format_brl(value)
 
     def update_result_card(card: ft.Card, title: str, invested: float, result: InvestmentResult):
         total = invested + result.interest_amount
@@ -322,7 +280,15 @@ def main(page: ft.Page):
     cdb_card = create_result_card("CDB / RDB", ft.Icons.ACCOUNT_BALANCE)
     lci_card = create_result_card("LCI / LCA", ft.Icons.ACCOUNT_BALANCE_WALLET)
 
+    # Número máximo de pontos por série enviados ao cliente Flet
+    PONTOS_GRAFICO = 300
+
+    @instrumentation.timed("update_chart")
     def update_chart(poupanca_perc: float, cdb_perc: float, lci_perc: float):
+        ultimo_grafico["percentuais"] = (poupanca_perc, cdb_perc, lci_perc)
+        if chart is None:
+            return
+        
         max_perc = max(poupanca_perc, cdb_perc, lci_perc)
         
         chart.content.controls[1].controls[0].content.controls[1].value = poupanca_perc / max_perc
@@ -334,10 +300,38 @@ def main(page: ft.Page):
         chart.content.controls[1].controls[2].content.controls[1].value = lci_perc / max_perc
         chart.content.controls[1].controls[2].content.controls[2].value = f"{lci_perc:.2f}%"
         
-        chart.update()
+        # As séries diárias só são recalculadas com o diálogo aberto; ao abrir, show_chart_dialog as atualiza
+        if grafico_visivel():
+            atualizar_series()
+            chart.update()
+
+    def grafico_visivel() -> bool:
+        # O gráfico só está na página quando o diálogo está aberto
+        return chart is not None and chart_dialog is not None and chart_dialog.open and chart.page is not None
+
+    @instrumentation.timed("atualizar_series")
+    def atualizar_series():
+        """Saldo diário reduzido a PONTOS_GRAFICO pontos por produto, para a última simulação"""
+        dados = ultima_simulacao.get("dados")
+        if dados is None or ultimo_grafico.get("dados") is dados:
+            return
+        from rendafixa.series import lttb, saldo_diario
+        valor, dias, di, cdb_rate, lci_rate, _ = dados
+        dias_serie, series = saldo_diario(valor, dias, di, cdb_rate, lci_rate)
+        line_chart = chart.content.controls[3]
+        for data, produto in zip(line_chart.data_series, ("poupanca", "cdb", "lci")):
+            x, y = lttb(dias_serie, series[produto], PONTOS_GRAFICO)
+            data.data_points = [
+                ft.LineChartDataPoint(float(xi), float(yi), tooltip=format_currency(float(yi)))
+                for xi, yi in zip(x, y)
+            ]
+        ultimo_grafico["dados"] = dados
 
     def show_chart_dialog(e):
+        nonlocal chart_dialog
         try:
+            get_chart()
+            atualizar_series()
             chart_dialog = ft.AlertDialog(
                 content=chart,
                 title=ft.Text("Comparativo de Rendimentos"),
@@ -351,6 +345,7 @@ def main(page: ft.Page):
         except Exception as e:
             show_snack_bar(page, f"Erro ao mostrar gráfico: {str(e)}")
 
+    @instrumentation.traced_action("calculate_gross_up")
     def calculate_gross_up(e):
         try:
             if not prazo.value or not taxa_di.value or not taxa_cdb.value or not taxa_lci.value:
@@ -427,12 +422,29 @@ def main(page: ft.Page):
         dialog.open = False
         page.update()
 
+    def run_task(chave: str, handler, e=None):
+        """No modo web, envia o handler ao pool compartilhado; no desktop executa direto"""
+        if not page.web:
+            return handler(e)
+        try:
+            get_worker_pool().submit(page.session_id, handler, e, chave=chave)
+        except PoolBusyError as busy:
+            show_snack_bar(page, str(busy))
+
+    def on_disconnect(e):
+        carregar_taxas().remove_listener(atualizar_taxas)
+        if page.web:
+            get_worker_pool().cancel_session(page.session_id)
+
+    page.on_disconnect = on_disconnect
+
     def show_snack_bar(page: ft.Page, message: str):
         snack_bar = ft.SnackBar(content=ft.Text(message))
         page.overlay.append(snack_bar)
         snack_bar.open = True
         page.update()
 
+    @instrumentation.traced_action("save_csv_file")
     def save_csv_file(e):
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -467,6 +479,7 @@ def main(page: ft.Page):
         except Exception as e:
             show_snack_bar(page, f"Erro ao salvar CSV: {str(e)}")
 
+    @instrumentation.traced_action("save_pdf_file")
     def save_pdf_file(e):
         try:
             # Gerar nome do arquivo automaticamente
@@ -476,6 +489,9 @@ def main(page: ft.Page):
             # Criar instância do calculador
             calc = FinanceCalculator()
             
+            from fpdf import FPDF
+            from rendafixa.rentabilidade import monthly_schedules
+            
             pdf = FPDF(orientation='L')
             pdf.add_page()
             
@@ -553,8 +569,8 @@ def main(page: ft.Page):
                 
                 # Coletar dados para o gráfico
                 try:
-                    valor = float(valor_investido.replace('R$ ', '').replace('.', '').replace(',', '.'))
-                    rendimento = float(rendimento_liquido.replace('R$ ', '').replace('.', '').replace(',', '.'))
+                    valor = parse_brl(valor_investido)
+                    rendimento = parse_brl(rendimento_liquido)
                     dados_grafico.append((tipo, (rendimento / valor) * 100))
                 except:
                     dados_grafico.append((tipo, 0))
@@ -653,7 +669,7 @@ def main(page: ft.Page):
             pdf.ln(5)
             
             # Calcular retornos mensais
-            valor = float(valor_inicial.value.replace('.', '').replace(',', '.'))
+            valor = parse_brl(valor_inicial.value)
             dias = int(prazo.value)
             if tipo_prazo.value == "meses":
                 dias = dias * 30
@@ -661,47 +677,11 @@ def main(page: ft.Page):
                 dias = dias * 365
             
             di = float(taxa_di.value.replace(',', '.'))
-            ir_rate = calc.get_index_ir(dias) / 100
-            
-            def calculate_monthly_returns(valor: float, index: float, dias: int, tipo: str, ir_rate: float = 0) -> list:
-                """Calcula os retornos mensais para um determinado investimento"""
-                monthly_returns = []
-                valor_atual = valor
-                
-                # Converter para índice diário
-                if tipo == "Poupança":
-                    daily_index = calc.get_index_poupanca(index)
-                else:
-                    daily_index = calc.get_index_lcx(index, float(taxa_di.value.replace(',', '.')))
-                
-                # Calcular para cada mês até completar o período
-                meses = math.ceil(dias / 30)
-                for mes in range(1, meses + 1):
-                    dias_no_mes = min(30, dias - ((mes-1) * 30))
-                    if dias_no_mes <= 0:
-                        break
-                        
-                    rendimento = calc.compound_interest(valor_atual, daily_index, dias_no_mes)
-                    
-                    # Aplicar IR se necessário
-                    if tipo == "CDB/RDB":
-                        rendimento_liquido = rendimento * (1 - ir_rate)
-                    else:
-                        rendimento_liquido = rendimento
-                        
-                    valor_atual += rendimento_liquido
-                    monthly_returns.append({
-                        'mes': mes,
-                        'rendimento': rendimento,
-                        'rendimento_liquido': rendimento_liquido,
-                        'valor_acumulado': valor_atual
-                    })
-                    
-                return monthly_returns
-            
-            poupanca_returns = calculate_monthly_returns(valor, di, dias, "Poupança")
-            cdb_returns = calculate_monthly_returns(valor, float(taxa_cdb.value.replace(',', '.')), dias, "CDB/RDB", ir_rate)
-            lci_returns = calculate_monthly_returns(valor, float(taxa_lci.value.replace(',', '.')), dias, "LCI/LCA")
+            schedules = monthly_schedules(
+                valor, dias, di,
+                float(taxa_cdb.value.replace(',', '.')),
+                float(taxa_lci.value.replace(',', '.'))
+            )
             
             # Configurar cabeçalho da tabela
             pdf.set_font('Arial', 'B', 8)
@@ -724,13 +704,21 @@ def main(page: ft.Page):
             max_linhas_pagina = int(espaco_disponivel / linha_altura)
             
             # Determinar quais linhas mostrar
-            max_rows = max(len(poupanca_returns), len(cdb_returns), len(lci_returns))
+            max_rows = len(schedules["poupanca"])
             if max_rows > max_linhas_pagina:
                 # Se não couber tudo, mostrar início e fim
                 linhas_cada_parte = max_linhas_pagina // 2
                 rows_to_show = list(range(linhas_cada_parte)) + ['...'] + list(range(max_rows - linhas_cada_parte, max_rows))
+                faixas = [(0, linhas_cada_parte), (max_rows - linhas_cada_parte, max_rows)]
             else:
                 rows_to_show = range(max_rows)
+                faixas = [(0, max_rows)]
+            
+            # Gerar apenas as linhas exibidas
+            poupanca_returns, cdb_returns, lci_returns = (
+                {linha['mes'] - 1: linha for inicio, fim in faixas for linha in schedules[produto].linhas(inicio, fim)}
+                for produto in ("poupanca", "cdb", "lci")
+            )
             
             # Preencher dados
             pdf.set_font('Arial', '', 8)
@@ -749,25 +737,25 @@ def main(page: ft.Page):
                 pdf.cell(col_width, 6, str(i + 1), 1, 0, 'C')
                 
                 # Poupança
-                if i < len(poupanca_returns):
-                    pdf.cell(col_width, 6, f"R$ {poupanca_returns[i]['rendimento_liquido']:,.2f}", 1, 0, 'R')
-                    pdf.cell(col_width, 6, f"R$ {poupanca_returns[i]['valor_acumulado']:,.2f}", 1, 0, 'R')
+                if i in poupanca_returns:
+                    pdf.cell(col_width, 6, format_brl(poupanca_returns[i]['rendimento_liquido']), 1, 0, 'R')
+                    pdf.cell(col_width, 6, format_brl(poupanca_returns[i]['valor_acumulado']), 1, 0, 'R')
                 else:
                     pdf.cell(col_width, 6, "-", 1, 0, 'C')
                     pdf.cell(col_width, 6, "-", 1, 0, 'C')
                 
                 # CDB/RDB
-                if i < len(cdb_returns):
-                    pdf.cell(col_width, 6, f"R$ {cdb_returns[i]['rendimento_liquido']:,.2f}", 1, 0, 'R')
-                    pdf.cell(col_width, 6, f"R$ {cdb_returns[i]['valor_acumulado']:,.2f}", 1, 0, 'R')
+                if i in cdb_returns:
+                    pdf.cell(col_width, 6, format_brl(cdb_returns[i]['rendimento_liquido']), 1, 0, 'R')
+                    pdf.cell(col_width, 6, format_brl(cdb_returns[i]['valor_acumulado']), 1, 0, 'R')
                 else:
                     pdf.cell(col_width, 6, "-", 1, 0, 'C')
                     pdf.cell(col_width, 6, "-", 1, 0, 'C')
                 
                 # LCI/LCA
-                if i < len(lci_returns):
-                    pdf.cell(col_width, 6, f"R$ {lci_returns[i]['rendimento_liquido']:,.2f}", 1, 0, 'R')
-                    pdf.cell(col_width, 6, f"R$ {lci_returns[i]['valor_acumulado']:,.2f}", 1, 0, 'R')
+                if i in lci_returns:
+                    pdf.cell(col_width, 6, format_brl(lci_returns[i]['rendimento_liquido']), 1, 0, 'R')
+                    pdf.cell(col_width, 6, format_brl(lci_returns[i]['valor_acumulado']), 1, 0, 'R')
                 else:
                     pdf.cell(col_width, 6, "-", 1, 0, 'C')
                     pdf.cell(col_width, 6, "-", 1, 0, 'C')
@@ -782,7 +770,8 @@ def main(page: ft.Page):
                 pdf.cell(0, 5, 'Nota: Algumas linhas intermediárias foram omitidas para melhor visualização', 0, 1, 'L')
             
             # Salvar PDF no local selecionado
-            pdf.output(file_path)
+            with instrumentation.timer("pdf.output"):
+                pdf.output(file_path)
             
             # Mostrar diálogo de sucesso
             success_dialog = ft.AlertDialog(
@@ -807,26 +796,307 @@ def main(page: ft.Page):
         except Exception as e:
             show_snack_bar(page, f"Erro ao salvar PDF: {str(e)}")
 
+    @instrumentation.traced_action("save_parquet_file")
+    def save_parquet_file(e):
+        try:
+            if "dados" not in ultima_simulacao:
+                raise ValueError("Realize um cálculo antes de exportar")
+
+            from rendafixa.exportacao import export_columnar
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_path = os.path.join(os.path.expanduser("~"), f"simulacao_investimentos_{timestamp}.parquet")
+            export_columnar(file_path, [ultima_simulacao["dados"]])
+
+            # Mostrar diálogo de sucesso
+            success_dialog = ft.AlertDialog(
+                title=ft.Text("Arquivo Salvo com Sucesso"),
+                content=ft.Container(
+                    content=ft.Column([
+                        ft.Text("O arquivo Parquet foi salvo em:"),
+                        ft.Text(file_path, selectable=True),  # Text com seleção habilitada
+                        ft.Text("Clique no caminho acima para copiar.", size=12, color=ft.colors.GREY_600),
+                    ]),
+                    padding=20,
+                ),
+                actions=[
+                    ft.TextButton("OK", on_click=lambda e: close_dialog(e, success_dialog))
+                ],
+            )
+
+            page.dialog = success_dialog
+            success_dialog.open = True
+            page.update()
+
+        except Exception as e:
+            show_snack_bar(page, f"Erro ao salvar Parquet: {str(e)}")
+
     def export_csv():
         try:
-            save_csv_file(None)  # Chamar diretamente a função de salvamento
+            run_task("csv", save_csv_file)
         except Exception as e:
             show_snack_bar(page, f"Erro ao gerar CSV: {str(e)}")
 
     def export_pdf():
         try:
-            save_pdf_file(None)  # Chamar diretamente a função de salvamento
+            run_task("pdf", save_pdf_file)
         except Exception as e:
             show_snack_bar(page, f"Erro ao gerar PDF: {str(e)}")
 
-    def calcular(e):
+    HISTORICO_POR_PAGINA = 20
+    NOMES_PRODUTOS = {"poupanca": "Poupança", "cdb": "CDB/RDB", "lci": "LCI/LCA"}
+
+    @instrumentation.traced_action("show_history_dialog")
+    def show_history_dialog(e):
+        try:
+            lista = ft.ListView(height=400, width=600, spacing=5)
+            pagina = {"offset": 0}
+
+            def carregar_pagina(e=None):
+                registros = get_history().buscar(limite=HISTORICO_POR_PAGINA, offset=pagina["offset"])
+                pagina["offset"] += len(registros)
+                for r in registros:
+                    data = datetime.fromisoformat(r["criado_em"]).strftime("%d/%m/%Y %H:%M")
+                    lista.controls.append(ft.Text(
+                        f"{data} - {NOMES_PRODUTOS[r['produto']]} - "
+                        f"{format_currency(r['valor'])} por {r['dias']} dias: "
+                        f"{format_currency(r['valor_total'])}"
+                    ))
+                mais_button.disabled = len(registros) < HISTORICO_POR_PAGINA
+                page.update()
+
+            mais_button = ft.TextButton("Carregar mais", on_click=carregar_pagina)
+            history_dialog = ft.AlertDialog(
+                title=ft.Text("Histórico de Simulações"),
+                content=lista,
+                actions=[
+                    mais_button,
+                    ft.TextButton("Fechar", on_click=lambda e: close_dialog(e, history_dialog))
+                ],
+            )
+            page.dialog = history_dialog
+            history_dialog.open = True
+            carregar_pagina()
+        except Exception as e:
+            show_snack_bar(page, f"Erro ao carregar histórico: {str(e)}")
+
+    LINHAS_POR_JANELA = 50
+
+    @instrumentation.traced_action("show_returns_dialog")
+    def show_returns_dialog(e):
+        try:
+            if "dados" not in ultima_simulacao:
+                raise ValueError("Realize um cálculo antes de ver a rentabilidade")
+            from rendafixa.rentabilidade import daily_schedules, monthly_schedules
+            valor, dias, di, cdb_rate, lci_rate, _ = ultima_simulacao["dados"]
+            schedules = {
+                "mensal": monthly_schedules(valor, dias, di, cdb_rate, lci_rate),
+                "diaria": daily_schedules(valor, dias, di, cdb_rate, lci_rate),
+            }
+
+            # Apenas as linhas da janela visível são geradas e enviadas ao cliente
+            lista = ft.ListView(height=400, item_extent=24)
+            janela = {"inicio": 0}
+
+            def celula(texto: str, width: int = 110) -> ft.Text:
+                return ft.Text(texto, width=width, size=12, text_align=ft.TextAlign.RIGHT)
+
+            def carregar_janela():
+                modo = modo_tabela.value
+                total = len(schedules[modo]["poupanca"])
+                inicio = max(0, min(janela["inicio"], total - LINHAS_POR_JANELA))
+                janela["inicio"] = inicio
+                fim = inicio + LINHAS_POR_JANELA
+                campo = "rendimento_liquido" if modo == "mensal" else "rendimento"
+
+                linhas = zip(*(schedules[modo][p].linhas(inicio, fim) for p in ("poupanca", "cdb", "lci")))
+                lista.controls = [
+                    ft.Row([celula(str(inicio + i + 1), 50)] + [
+                        c
+                        for linha in produtos
+                        for c in (celula(format_currency(linha[campo])), celula(format_currency(linha['valor_acumulado'])))
+                    ])
+                    for i, produtos in enumerate(linhas)
+                ]
+                posicao.max = max(1, total - LINHAS_POR_JANELA)
+                posicao.value = inicio
+                legenda.value = f"{inicio + 1} a {min(fim, total)} de {total}"
+                page.update()
+
+            def mover(delta: int):
+                janela["inicio"] += delta
+                carregar_janela()
+
+            def ir_para(e):
+                janela["inicio"] = int(posicao.value)
+                carregar_janela()
+
+            def trocar_modo(e):
+                janela["inicio"] = 0
+                unidade = "Mês" if modo_tabela.value == "mensal" else "Dia"
+                cabecalho.controls[0].value = unidade
+                carregar_janela()
+
+            modo_tabela = ft.Dropdown(
+                options=[ft.dropdown.Option("mensal", "Mensal"), ft.dropdown.Option("diaria", "Diária")],
+                value="mensal",
+                on_change=trocar_modo,
+                width=150,
+            )
+            posicao = ft.Slider(min=0, max=1, value=0, on_change_end=ir_para, expand=True)
+            legenda = ft.Text()
+            cabecalho = ft.Row([celula("Mês", 50)] + [
+                celula(titulo, 110)
+                for titulo in ("Poupança (R$)", "Acumulado", "CDB/RDB (R$)", "Acumulado", "LCI/LCA (R$)", "Acumulado")
+            ])
+            for c in cabecalho.controls:
+                c.weight = ft.FontWeight.BOLD
+
+            returns_dialog = ft.AlertDialog(
+                title=ft.Text("Rentabilidade"),
+                content=ft.Column([
+                    ft.Row([modo_tabela, posicao]),
+                    cabecalho,
+                    lista,
+                    legenda,
+                ], width=850, tight=True),
+                actions=[
+                    ft.TextButton("Anterior", on_click=lambda e: mover(-LINHAS_POR_JANELA)),
+                    ft.TextButton("Próximo", on_click=lambda e: mover(LINHAS_POR_JANELA)),
+                    ft.TextButton("Fechar", on_click=lambda e: close_dialog(e, returns_dialog))
+                ],
+            )
+            page.dialog = returns_dialog
+            returns_dialog.open = True
+            carregar_janela()
+        except ValueError as ve:
+            show_snack_bar(page, str(ve))
+        except Exception as e:
+            show_snack_bar(page, f"Erro ao mostrar rentabilidade: {str(e)}")
+
+    @instrumentation.traced_action("show_redemption_dialog")
+    def show_redemption_dialog(e):
+        try:
+            if "dados" not in ultima_simulacao:
+                raise ValueError("Realize um cálculo antes de analisar o resgate antecipado")
+            from rendafixa.resgate import analisar_resgates
+            valor, dias, di, cdb_rate, lci_rate, _ = ultima_simulacao["dados"]
+            analise = analisar_resgates(valor, dias, di, cdb_rate, lci_rate)
+
+            janelas = ft.Column([
+                ft.Text(f"Dias {inicio} a {fim}: {NOMES_PRODUTOS[produto]}")
+                for produto, inicio, fim in analise.janelas()
+            ])
+            cruzamentos = analise.cruzamentos()
+            texto_cruzamentos = "; ".join(
+                f"dia {dia}: {NOMES_PRODUTOS[de]} → {NOMES_PRODUTOS[para]}"
+                for dia, de, para in cruzamentos
+            ) or "Nenhum: o melhor produto é o mesmo em todo o prazo"
+
+            # Os valores de todos os dias já estão calculados; o controle só consulta o array
+            valores_dia = ft.Column()
+
+            def mostrar_dia(e=None):
+                dia = int(dia_resgate.value)
+                liquido = analise.no_dia(dia)
+                rotulo_dia.value = f"Resgate no dia {dia}"
+                valores_dia.controls = [
+                    ft.Text(f"{nome}: {format_currency(liquido[produto])}")
+                    for produto, nome in NOMES_PRODUTOS.items()
+                ]
+                page.update()
+
+            dia_resgate = ft.Slider(
+                min=1, max=max(dias, 2), divisions=max(dias - 1, 1), value=dias,
+                on_change=mostrar_dia, expand=True,
+            )
+            rotulo_dia = ft.Text(weight=ft.FontWeight.BOLD)
+
+            redemption_dialog = ft.AlertDialog(
+                title=ft.Text("Resgate Antecipado"),
+                content=ft.Column([
+                    rotulo_dia,
+                    ft.Row([dia_resgate]),
+                    valores_dia,
+                    ft.Divider(),
+                    ft.Text("Melhor produto por período de resgate", weight=ft.FontWeight.BOLD),
+                    janelas,
+                    ft.Text(f"Cruzamentos: {texto_cruzamentos}"),
+                ], width=600, tight=True, scroll=ft.ScrollMode.AUTO),
+                actions=[
+                    ft.TextButton("Fechar", on_click=lambda e: close_dialog(e, redemption_dialog))
+                ],
+            )
+            page.dialog = redemption_dialog
+            redemption_dialog.open = True
+            mostrar_dia()
+        except ValueError as ve:
+            show_snack_bar(page, str(ve))
+        except Exception as e:
+            show_snack_bar(page, f"Erro ao analisar resgate antecipado: {str(e)}")
+
+    def show_debug_dialog(e):
+        try:
+            stats = instrumentation.stats()
+            linhas = [
+                ft.Text(
+                    f"{nome}: {t['count']}x, média {t['mean_ms']:.3f} ms, "
+                    f"máx {t['max_ms']:.3f} ms, total {t['total_ms']:.1f} ms"
+                )
+                for nome, t in sorted(stats["timers"].items(), key=lambda item: -item[1]["total_ms"])
+            ]
+            linhas.extend(
+                ft.Text(f"{nome}: {valor}") for nome, valor in sorted(stats["counters"].items())
+            )
+            cache_stats = result_cache.stats()
+            linhas.append(ft.Divider())
+            linhas.append(ft.Text(
+                f"Cache: {cache_stats['hit_rate']*100:.1f}% de acertos "
+                f"({cache_stats['hits_memory']} memória, {cache_stats['hits_disk']} disco, "
+                f"{cache_stats['misses']} falhas)"
+            ))
+            if page.web:
+                pool_stats = get_worker_pool().stats()
+                linhas.append(ft.Text(
+                    f"Pool: {pool_stats['running']} em execução, {pool_stats['pending']} pendentes, "
+                    f"{pool_stats['rejected']} recusadas ({pool_stats['workers']} workers)"
+                ))
+            for nome in stats["timers"]:
+                relatorio = instrumentation.profile(nome)
+                if relatorio:
+                    linhas.append(ft.Divider())
+                    linhas.append(ft.Text(f"cProfile - {nome}", weight=ft.FontWeight.BOLD))
+                    linhas.append(ft.Text(relatorio, size=10, font_family="monospace", selectable=True))
+
+            def salvar_json(e):
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                file_path = os.path.join(os.path.expanduser("~"), f"instrumentacao_{timestamp}.json")
+                instrumentation.dump_json(file_path)
+                show_snack_bar(page, f"Estatísticas salvas em {file_path}")
+
+            debug_dialog = ft.AlertDialog(
+                title=ft.Text("Depuração - Desempenho"),
+                content=ft.ListView(controls=linhas, height=400, width=700),
+                actions=[
+                    ft.TextButton("Salvar JSON", on_click=salvar_json),
+                    ft.TextButton("Fechar", on_click=lambda e: close_dialog(e, debug_dialog))
+                ],
+            )
+            page.dialog = debug_dialog
+            debug_dialog.open = True
+            page.update()
+        except Exception as e:
+            show_snack_bar(page, f"Erro ao mostrar estatísticas: {str(e)}")
+
+    @instrumentation.traced_action("calcular")
+    def calcular(e, registrar: bool = False):
+        """Recalcula os resultados; com `registrar`, grava a simulação no histórico"""
         try:
             # Validação dos campos
             if not valor_inicial.value or not prazo.value or not taxa_di.value or \
                not taxa_cdb.value or not taxa_lci.value:
                 raise ValueError("Preencha todos os campos obrigatórios")
 
-            valor = float(valor_inicial.value.replace('.', '').replace(',', '.'))
+            valor = parse_brl(valor_inicial.value)
             dias = int(prazo.value)
             
             if valor <= 0:
@@ -842,34 +1112,37 @@ def main(page: ft.Page):
                 
             di = float(taxa_di.value.replace(',', '.'))
             
-            # Cálculo Poupança
-            index_poupanca = calc.get_index_poupanca(di)
-            poupanca_result = InvestmentResult(
-                interest_amount=calc.compound_interest(valor, index_poupanca, dias)
-            )
-            
-            # Cálculo CDB
             cdb_rate = float(taxa_cdb.value.replace(',', '.'))
-            index_cdb = calc.get_index_lcx(cdb_rate, di)
-            interest_cdb = calc.compound_interest(valor, index_cdb, dias)
-            
-            tax_percentage = calc.get_index_ir(dias)
-            iof_amount = calc.get_iof_amount(dias, interest_cdb)
-            tax_amount = (interest_cdb - iof_amount) * (tax_percentage / 100)
-            
-            cdb_result = InvestmentResult(
-                interest_amount=interest_cdb,
-                tax_amount=tax_amount,
-                tax_percentage=tax_percentage,
-                iof_amount=iof_amount
-            )
-            
-            # Cálculo LCI/LCA
             lci_rate = float(taxa_lci.value.replace(',', '.'))
-            index_lci = calc.get_index_lcx(lci_rate, di)
-            lci_result = InvestmentResult(
-                interest_amount=calc.compound_interest(valor, index_lci, dias)
-            )
+            if motor_calculo.value == "decimal":
+                from rendafixa.motores import simular_decimal
+                # Resultados exatos arredondados por centavo; convertidos para exibição
+                with instrumentation.timer("simular_decimal"):
+                    resultados = {
+                        produto: resultado.as_float()
+                        for produto, resultado in simular_decimal(valor, dias, di, cdb_rate, lci_rate).items()
+                    }
+            else:
+                with instrumentation.timer("result_cache.simular"):
+                    resultados = result_cache.simular(valor, dias, di, cdb_rate, lci_rate)
+            poupanca_result = resultados["poupanca"]
+            cdb_result = resultados["cdb"]
+            lci_result = resultados["lci"]
+            
+            if registrar:
+                selic = float(taxa_selic.value.replace(',', '.')) if taxa_selic.value else None
+                with instrumentation.timer("history.registrar"):
+                    get_history().registrar(valor, dias, di, cdb_rate, lci_rate, resultados, selic=selic)
+            ultima_simulacao["dados"] = (valor, dias, di, cdb_rate, lci_rate, resultados)
+            if motor_calculo.value == "verificacao":
+                from rendafixa.motores import verificar_divergencias
+                divergencias = verificar_divergencias(valor, dias, di, cdb_rate, lci_rate)
+                if divergencias:
+                    show_snack_bar(page, "Divergência entre motores: " + "; ".join(
+                        f"{NOMES_PRODUTOS[d['produto']]} {d['campo']}: "
+                        f"{format_currency(d['float'])} x {format_currency(d['decimal'])}"
+                        for d in divergencias
+                    ))
             
             # Atualizar cards
             update_result_card(poupanca_card, "Poupança", valor, poupanca_result)
@@ -877,12 +1150,13 @@ def main(page: ft.Page):
             update_result_card(lci_card, "LCI / LCA", valor, lci_result)
             
             # Atualizar gráfico
-            poupanca_perc = (poupanca_result.interest_amount / valor) * 100
-            cdb_perc = ((interest_cdb - tax_amount - iof_amount) / valor) * 100
-            lci_perc = (lci_result.interest_amount / valor) * 100
+            poupanca_perc = (poupanca_result.total_amount(valor) / valor - 1) * 100
+            cdb_perc = (cdb_result.total_amount(valor) / valor - 1) * 100
+            lci_perc = (lci_result.total_amount(valor) / valor - 1) * 100
             update_chart(poupanca_perc, cdb_perc, lci_perc)
             
-            page.update()
+            with instrumentation.timer("page.update"):
+                page.update()
             
         except ValueError as ve:
             show_snack_bar(page, str(ve))
@@ -890,11 +1164,13 @@ def main(page: ft.Page):
             show_snack_bar(page, f"Erro nos cálculos: {str(e)}")
     
     # Botões de ação com cores corrigidas
-    botoes = ft.Row([
+    botoes = ft.Row(wrap=True, controls=[
         ft.ElevatedButton(
             "Calcular",
             icon=ft.Icons.CALCULATE,
-            on_click=calcular,
+            # Apenas o clique grava no histórico; os recálculos a cada tecla não.
+            # Chave própria para que um recálculo posterior não descarte o registro pendente.
+            on_click=lambda e: run_task("registrar", lambda e: calcular(e, registrar=True), e),
             style=ft.ButtonStyle(
                 bgcolor=COLORS['primary'],
                 color=ft.Colors.WHITE,
@@ -919,6 +1195,25 @@ def main(page: ft.Page):
                 color=ft.Colors.BLACK,
             )
         ),
+        ft.ElevatedButton(
+            "Rentabilidade",
+            icon=ft.Icons.TABLE_ROWS,
+            on_click=show_returns_dialog,
+            style=ft.ButtonStyle(
+                bgcolor=COLORS['accent'],
+                color=ft.Colors.BLACK,
+            )
+        ),
+        ft.ElevatedButton(
+            "Resgate Antecipado",
+            icon=ft.Icons.TIMELINE,
+            on_click=show_redemption_dialog,
+            style=ft.ButtonStyle(
+                bgcolor=COLORS['accent'],
+                color=ft.Colors.BLACK,
+            ),
+            tooltip="Comparar o valor líquido de cada produto em cada dia de resgate"
+        ),
         ft.ElevatedButton(
             "Exportar CSV",
             icon=ft.Icons.DOWNLOAD,
@@ -937,8 +1232,36 @@ def main(page: ft.Page):
                 color=ft.Colors.WHITE,
             )
         ),
+        ft.ElevatedButton(
+            "Exportar Parquet",
+            icon=ft.Icons.TABLE_CHART,
+            on_click=lambda e: run_task("parquet", save_parquet_file, e),
+            style=ft.ButtonStyle(
+                bgcolor=COLORS['secondary'],
+                color=ft.Colors.BLACK,
+            )
+        ),
+        ft.ElevatedButton(
+            "Histórico",
+            icon=ft.Icons.HISTORY,
+            on_click=show_history_dialog,
+            style=ft.ButtonStyle(
+                bgcolor=COLORS['dark_accent'],
+                color=ft.Colors.WHITE,
+            )
+        ),
     ])
 
+    # Painel de depuração disponível apenas com a instrumentação habilitada
+    if instrumentation.enabled:
+        botoes.controls.append(
+            ft.ElevatedButton(
+                "Depuração",
+                icon=ft.Icons.SPEED,
+                on_click=show_debug_dialog,
+            )
+        )
+
     # Layout
     page.scroll = ft.ScrollMode.AUTO
     
@@ -951,6 +1274,7 @@ def main(page: ft.Page):
             taxa_selic,
             taxa_cdb,
             taxa_lci,
+            motor_calculo,
             botoes,
         ]),
         padding=20,
@@ -962,23 +1286,47 @@ def main(page: ft.Page):
     )
 
     # Atualização automática ao modificar campos
-    for field in [valor_inicial, prazo, taxa_di, taxa_selic, taxa_cdb, taxa_lci, tipo_prazo]:
-        field.on_change = calcular
+    for field in [valor_inicial, prazo, taxa_di, taxa_selic, taxa_cdb, taxa_lci, tipo_prazo, motor_calculo]:
+        field.on_change = lambda e: run_task("calcular", calcular, e)
 
-    # Valores iniciais para os campos
+    # Valores iniciais para os campos, definidos antes do listener de taxas, que pode chamar calcular
     valor_inicial.value = "1000"
     prazo.value = "360"
-    taxa_di.value = "12.65"
-    taxa_selic.value = "12.75"
     taxa_cdb.value = "100"
     taxa_lci.value = "100"
     tipo_prazo.value = "dias"
+    # DI e SELIC vêm do snapshot local de taxas, sem esperar pela fonte
+    taxas = carregar_taxas()
+    taxas_exibidas = {}
+    # Serializa a exibição inicial e as atualizações vindas da thread de atualização
+    taxas_lock = threading.Lock()
 
-    # Adicionar o FilePicker ao inicializar a página
-    page.overlay.extend([
-        ft.FilePicker(),
-    ])
-    page.update()
+    def mostrar_taxas(snapshot: RateSnapshot):
+        taxa_di.value = f"{snapshot.di:g}"
+        taxa_selic.value = f"{snapshot.selic:g}"
+        taxas_exibidas.update(di=taxa_di.value, selic=taxa_selic.value)
+        if not snapshot.data:
+            taxa_di.helper_text = None
+            return
+        try:
+            taxa_di.helper_text = f"Fonte: {snapshot.fonte}, {datetime.strptime(snapshot.data, '%Y-%m-%d'):%d/%m/%Y}"
+        except ValueError:
+            # Data fora do formato esperado não deve impedir a abertura da página
+            taxa_di.helper_text = f"Fonte: {snapshot.fonte}"
+
+    def atualizar_taxas(snapshot: RateSnapshot):
+        # Chamado pela atualização em segundo plano; não sobrescreve valores digitados
+        with taxas_lock:
+            if taxa_di.value != taxas_exibidas.get("di") or taxa_selic.value != taxas_exibidas.get("selic"):
+                return
+            mostrar_taxas(snapshot)
+        run_task("calcular", calcular)
+
+    # O listener é registrado antes de atual(), que pode disparar a atualização
+    with taxas_lock:
+        taxas.on_update(atualizar_taxas)
+        mostrar_taxas(taxas.atual())
+    taxas.iniciar_verificacao()
 
     page.add(
         ft.Container(
@@ -1004,4 +1352,13 @@ def main(page: ft.Page):
     )
 
 if __name__ == "__main__":
-    ft.app(target=main) 
\ No newline at end of file
+    if os.environ.get("RENDAFIXA_SERVER") == "1":
+        # Modo servidor: várias sessões web compartilhando o pool de cálculo
+        ft.app(
+            target=main,
+            view=None,
+            host=os.environ.get("RENDAFIXA_HOST", "0.0.0.0"),
+            port=int(os.environ.get("RENDAFIXA_PORT", 8550)),
+        )
+    else:
+        ft.app(target=main) 
\ No newline at end of file
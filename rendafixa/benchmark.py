@@ -0,0 +1,150 @@
+"""Benchmarks dos caminhos críticos
+
+Uso:
+    python -m rendafixa.benchmark motores [-n 100000]
+    python -m rendafixa.benchmark startup [-n 10]
+    python -m rendafixa.benchmark moeda [-n 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def _cenarios(n: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [
+        (
+            round(rng.uniform(100, 1_000_000), 2),
+            rng.randint(1, 3650),
+            round(rng.uniform(2, 15), 2),
+            round(rng.uniform(80, 130), 1),
+            round(rng.uniform(80, 100), 1),
+        )
+        for _ in range(n)
+    ]
+
+
+def _medir(nome: str, n: int, fn):
+    inicio = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - inicio
+    print(f"{nome:<28} {elapsed:9.3f} s  {elapsed / n * 1e6:10.2f} µs/cenário")
+
+
+def bench_motores(n: int):
+    from rendafixa.calculadora import simular
+    from rendafixa.motores import simular_decimal, simular_lote, verificar_divergencias
+
+    cenarios = _cenarios(n)
+    colunas = [np.array(c) for c in zip(*cenarios)]
+    # O motor Decimal é bem mais lento; mede uma amostra para manter o benchmark curto
+    amostra = cenarios[:max(1, n // 10)]
+
+    print(f"{n} cenários (Decimal: {len(amostra)})")
+    _medir("float (simular)", n, lambda: [simular(*c) for c in cenarios])
+    _medir("numpy (simular_lote)", n, lambda: simular_lote(*colunas))
+    _medir("decimal (simular_decimal)", len(amostra), lambda: [simular_decimal(*c) for c in amostra])
+
+    divergentes = sum(1 for c in amostra if verificar_divergencias(*c))
+    print(f"Cenários com divergência de centavos float x Decimal: {divergentes}/{len(amostra)}")
+
+
+def bench_moeda(n: int):
+    from rendafixa.moeda import format_brl, format_brl_many, parse_brl, parse_brl_many
+
+    rng = random.Random(42)
+    valores = [rng.uniform(-1e7, 1e7) for _ in range(n)]
+
+    def format_replace(value: float) -> str:
+        # Implementação anterior de format_currency
+        return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+    def parse_replace(texto: str) -> float:
+        return float(texto.replace('R$ ', '').replace('.', '').replace(',', '.'))
+
+    print(f"{n} valores")
+    _medir("format (3x replace)", n, lambda: [format_replace(v) for v in valores])
+    _medir("format_brl", n, lambda: [format_brl(v) for v in valores])
+    _medir("format_brl_many", n, lambda: format_brl_many(valores))
+
+    textos = format_brl_many(valores)
+    assert textos == [format_replace(v) for v in valores]
+    _medir("parse (3x replace)", n, lambda: [parse_replace(t) for t in textos])
+    _medir("parse_brl", n, lambda: [parse_brl(t) for t in textos])
+    _medir("parse_brl_many", n, lambda: parse_brl_many(textos))
+
+
+# Executado em um processo novo a cada rodada, para medir a partida a frio
+_STARTUP_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+class HeadlessPage:
+    web = False
+    session_id = "benchmark"
+    def __init__(self):
+        self.overlay = []
+        self.controls = []
+    def add(self, *controls):
+        self.controls.extend(controls)
+    def update(self, *controls):
+        pass
+
+main.main(HeadlessPage())
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "main_ms": (t2 - t1) * 1000}))
+"""
+
+
+def bench_startup(n: int):
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    rodadas = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        saida = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT],
+            cwd=raiz, capture_output=True, text=True, check=True,
+        ).stdout
+        medidas = json.loads(saida.strip().splitlines()[-1])
+        medidas["processo_ms"] = (time.perf_counter() - inicio) * 1000
+        rodadas.append(medidas)
+
+    print(f"{n} partidas a frio (mediana / mínimo)")
+    for chave, nome in (("import_ms", "import main"), ("main_ms", "main(page)"), ("processo_ms", "processo completo")):
+        valores = [r[chave] for r in rodadas]
+        print(f"{nome:<20} {statistics.median(valores):9.1f} ms  {min(valores):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    motores = sub.add_parser("motores", help="Compara os motores float, NumPy e Decimal")
+    motores.add_argument("-n", type=int, default=100_000)
+
+    startup = sub.add_parser("startup", help="Mede o tempo de inicialização da aplicação")
+    startup.add_argument("-n", type=int, default=10)
+
+    moeda = sub.add_parser("moeda", help="Compara a formatação de moeda atual com str.replace")
+    moeda.add_argument("-n", type=int, default=1_000_000)
+
+    args = parser.parse_args()
+    if args.comando == "motores":
+        bench_motores(args.n)
+    elif args.comando == "startup":
+        bench_startup(args.n)
+    elif args.comando == "moeda":
+        bench_moeda(args.n)
+
+
+if __name__ == "__main__":
+    main()
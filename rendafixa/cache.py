@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from dataclasses import asdict
+from decimal import Decimal
+from typing import Callable, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+
+from rendafixa.calculadora import InvestmentResult, simular, tax_schedule_version
+from rendafixa.instrumentacao import instrumentation
+from rendafixa.tributos import regras_vigentes
+
+
+def _normalize_rate(value: float) -> str:
+    # Decimal normaliza "12.650" e "12.65" para a mesma representação
+    return format(Decimal(str(value)).normalize(), "f")
+
+
+def cache_key(valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float,
+              versao: str) -> str:
+    """Gera a chave do cache a partir das entradas normalizadas da simulação"""
+    payload = json.dumps([
+        versao,
+        f"{valor:.2f}",
+        int(dias),
+        _normalize_rate(di),
+        _normalize_rate(taxa_cdb),
+        _normalize_rate(taxa_lci),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Cache de resultados de simulação com camada LRU em memória e SQLite opcional
+
+    Sem `versao`, a chave usa a versão das regras tributárias vigentes em cada chamada,
+    e `compute` recebe essas mesmas regras (argumento `regras`). Quando uma nova versão
+    entra em vigor, os resultados calculados com a anterior são descartados.
+    """
+
+    def __init__(self, max_size: int = 1024, db_path: Optional[str] = None,
+                 versao: Optional[str] = None,
+                 compute: Callable[..., dict] = simular):
+        self.max_size = max_size
+        self._versao_fixa = versao
+        self.versao = versao or tax_schedule_version()
+        self._compute = compute
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                "chave TEXT PRIMARY KEY, versao TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+            # Descarta resultados calculados com outra versão da tabela de impostos
+            self._db.execute("DELETE FROM resultados WHERE versao != ?", (self.versao,))
+            self._db.commit()
+
+    def _regras(self) -> tuple:
+        """Regras vigentes agora e a versão correspondente; uma versão nova descarta a anterior"""
+        regras = regras_vigentes()
+        versao = self._versao_fixa or tax_schedule_version(regras)
+        if versao != self.versao:
+            with self._lock:
+                if versao != self.versao:
+                    self.versao = versao
+                    self._memory.clear()
+                    if self._db is not None:
+                        self._db.execute("DELETE FROM resultados WHERE versao != ?", (versao,))
+                        self._db.commit()
+        return regras, versao
+
+    def simular(self, valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float) -> dict:
+        # A chave considera o valor em centavos; o cálculo usa o mesmo valor arredondado
+        valor = round(valor, 2)
+        regras, versao = self._regras()
+        chave = cache_key(valor, dias, di, taxa_cdb, taxa_lci, versao)
+
+        with self._lock:
+            resultado = self._memory.get(chave)
+            if resultado is not None:
+                self._memory.move_to_end(chave)
+                self.hits_memory += 1
+                instrumentation.count("result_cache.hits_memory")
+                return resultado
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload FROM resultados WHERE chave = ?", (chave,)
+                ).fetchone()
+                if row is not None:
+                    resultado = {
+                        produto: InvestmentResult(**dados)
+                        for produto, dados in json.loads(row[0]).items()
+                    }
+                    self._store_memory(chave, resultado)
+                    self.hits_disk += 1
+                    instrumentation.count("result_cache.hits_disk")
+                    return resultado
+
+            self.misses += 1
+            instrumentation.count("result_cache.misses")
+
+        resultado = self._compute(valor, dias, di, taxa_cdb, taxa_lci, regras=regras)
+
+        with self._lock:
+            self._store_memory(chave, resultado)
+            if self._db is not None:
+                payload = json.dumps({produto: asdict(r) for produto, r in resultado.items()})
+                self._db.execute(
+                    "INSERT OR REPLACE INTO resultados (chave, versao, payload) VALUES (?, ?, ?)",
+                    (chave, versao, payload)
+                )
+                self._db.commit()
+
+        return resultado
+
+    def _store_memory(self, chave: str, resultado: dict):
+        self._memory[chave] = resultado
+        self._memory.move_to_end(chave)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def invalidate(self):
+        """Descarta todos os resultados, em memória e em disco
+
+        A versão usada nas chaves continua sendo resolvida a cada chamada, então uma
+        nova versão das regras ainda é detectada depois da limpeza.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM resultados")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "size": len(self._memory),
+                "hit_rate": (self.hits_memory + self.hits_disk) / total if total else 0.0,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
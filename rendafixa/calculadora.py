@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Optional
+import math
+
+from rendafixa.instrumentacao import instrumentation
+from rendafixa.tributos import TaxRules, regras_vigentes
+
+# Revisão das fórmulas de simular(); deve ser incrementada sempre que os resultados
+# mudarem por outro motivo que não as regras tributárias, para invalidar o cache.
+CALCULATION_REVISION = 2
+
+PRODUTOS = ("poupanca", "cdb", "lci")
+
+# A poupança só credita o rendimento a cada aniversário mensal da aplicação
+DIAS_ANIVERSARIO_POUPANCA = 30
+
+
+def tax_schedule_version(regras: Optional[TaxRules] = None) -> str:
+    """Versão dos resultados de simular(): regras vigentes no momento do cálculo e revisão das fórmulas"""
+    regras = regras or regras_vigentes()
+    return f"{regras.versao}.r{CALCULATION_REVISION}"
+
+
+@dataclass
+class InvestmentResult:
+    interest_amount: float
+    tax_amount: Optional[float] = None
+    tax_percentage: Optional[float] = None
+    iof_amount: Optional[float] = None
+
+    def total_amount(self, invested: float) -> float:
+        """Valor total líquido no resgate, descontados IR e IOF"""
+        return invested + self.interest_amount - (self.tax_amount or 0) - (self.iof_amount or 0)
+
+    def as_float(self) -> "InvestmentResult":
+        """Cópia com valores float, para resultados do motor Decimal"""
+        return InvestmentResult(*(None if v is None else float(v) for v in (
+            self.interest_amount, self.tax_amount, self.tax_percentage, self.iof_amount
+        )))
+
+class FinanceCalculator:
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.compound_interest")
+    def compound_interest(amount: float, index: float, days: int) -> float:
+        interest = amount * (math.pow(index, days) - 1)
+        return round(interest, 2)
+
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.get_index_ir")
+    def get_index_ir(days: int) -> float:
+        return regras_vigentes().ir(days)
+
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.get_iof_percentage")
+    def get_iof_percentage(days_to_redeem: int) -> float:
+        return regras_vigentes().iof(days_to_redeem)
+
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.get_iof_amount")
+    def get_iof_amount(days_to_redeem: int, interest_amount: float) -> float:
+        iof_percentage = FinanceCalculator.get_iof_percentage(days_to_redeem)
+        return interest_amount * (iof_percentage / 100)
+
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.get_index_lcx")
+    def get_index_lcx(yearly_interest: float, di: float) -> float:
+        index = yearly_interest / 100
+        return math.pow((index * di) / 100 + 1, 1 / 365)
+
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.get_index_poupanca")
+    def get_index_poupanca(index: float) -> float:
+        # Correção do cálculo da poupança: 70% da taxa SELIC quando SELIC > 8.5% ao ano
+        # ou 0.5% ao mês + TR quando SELIC <= 8.5%
+        selic_mensal = (index / 100) / 12
+        if index > 8.5:
+            return math.pow((selic_mensal * 0.7) + 1, 1/30)
+        else:
+            return math.pow((0.5/100) + 1, 1/30)  # Simplificado, sem considerar TR
+
+    @staticmethod
+    @instrumentation.timed("FinanceCalculator.calculate_full_months_days")
+    def calculate_full_months_days(days: int) -> int:
+        days_in_month = DIAS_ANIVERSARIO_POUPANCA
+        return 0 if days < days_in_month else math.floor(days / days_in_month) * days_in_month
+
+class InvestmentCalculator:
+    def __init__(self):
+        self.finance = FinanceCalculator()
+
+    def calculate_poupanca(self, amount: float, index: float, days: int) -> dict:
+        full_months_days = self.finance.calculate_full_months_days(days)
+        interest_amount = self.finance.compound_interest(
+            amount,
+            self.finance.get_index_poupanca(index),
+            full_months_days
+        )
+        return {"interest_amount": interest_amount}
+
+    def calculate_lcx(self, amount: float, di: float, yearly_index: float, days: int) -> dict:
+        interest_amount = self.finance.compound_interest(
+            amount,
+            self.finance.get_index_lcx(yearly_index, di),
+            days
+        )
+        return {"interest_amount": interest_amount}
+
+    def calculate_cdb(self, amount: float, di: float, yearly_index: float, days: int) -> dict:
+        interest_amount = self.finance.compound_interest(
+            amount,
+            self.finance.get_index_lcx(yearly_index, di),
+            days
+        )
+        tax_percentage = self.finance.get_index_ir(days)
+        iof_amount = self.finance.get_iof_amount(days, interest_amount)
+        tax_amount = (interest_amount - iof_amount) * (tax_percentage / 100)
+        
+        return {
+            "interest_amount": interest_amount,
+            "tax_amount": tax_amount,
+            "tax_percentage": tax_percentage,
+            "iof_amount": iof_amount
+        }
+
+def apply_taxes(regras: TaxRules, produto: str, interest_amount: float, days: int) -> InvestmentResult:
+    """Aplica IOF e IR conforme as regras do produto; produtos isentos ficam só com o rendimento"""
+    regra = regras.produto(produto)
+    result = InvestmentResult(interest_amount=interest_amount)
+    if regra.iof:
+        result.iof_amount = interest_amount * (regras.iof(days) / 100)
+    if regra.ir:
+        result.tax_percentage = regras.ir(days)
+        result.tax_amount = (interest_amount - (result.iof_amount or 0)) * (result.tax_percentage / 100)
+    return result
+
+@instrumentation.timed("simular")
+def simular(valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float,
+            regras: Optional[TaxRules] = None) -> dict:
+    """Calcula Poupança, CDB/RDB e LCI/LCA para resgate após `dias` dias
+
+    A poupança rende apenas até o último aniversário completo, como em
+    InvestmentCalculator.calculate_poupanca. Sem `regras`, usa a versão das
+    regras tributárias vigente hoje.
+    """
+    calc = FinanceCalculator()
+    regras = regras or regras_vigentes()
+    indices = {
+        "poupanca": (calc.get_index_poupanca(di), calc.calculate_full_months_days(dias)),
+        "cdb": (calc.get_index_lcx(taxa_cdb, di), dias),
+        "lci": (calc.get_index_lcx(taxa_lci, di), dias),
+    }
+    return {
+        produto: apply_taxes(regras, produto, calc.compound_interest(valor, index, dias_credito), dias)
+        for produto, (index, dias_credito) in indices.items()
+    }
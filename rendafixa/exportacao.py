@@ -0,0 +1,152 @@
+from typing import Iterable
+
+from rendafixa.calculadora import PRODUTOS
+
+FORMATOS = ("parquet", "arrow")
+
+_COLUNAS_FLOAT = (
+    "valor", "di", "taxa_cdb", "taxa_lci", "rendimento_bruto", "iof", "ir",
+    "ir_percentual", "rendimento_liquido", "valor_total",
+)
+
+# Coluna de cada campo de simular_lote; campos ausentes no produto ficam nulos, como em add()
+_CAMPOS_LOTE = {
+    "rendimento_bruto": "interest_amount",
+    "iof": "iof_amount",
+    "ir": "tax_amount",
+    "ir_percentual": "tax_percentage",
+    "valor_total": "total_amount",
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError(
+            "A exportação Parquet/Arrow requer o pacote pyarrow (poetry install -E parquet)"
+        ) from exc
+    return pyarrow
+
+
+def _schema(pa):
+    return pa.schema(
+        [("produto", pa.dictionary(pa.int8(), pa.string())), ("dias", pa.int32())]
+        + [(coluna, pa.float64()) for coluna in _COLUNAS_FLOAT]
+    )
+
+
+class ColumnarWriter:
+    """Grava resultados de simulação em colunas tipadas (Parquet ou Arrow IPC) em lotes"""
+
+    def __init__(self, file_path: str, formato: str = "parquet", batch_size: int = 65536):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido: {formato}")
+
+        self._pa = _import_pyarrow()
+        self.schema = _schema(self._pa)
+        self.batch_size = batch_size
+        self._buffers = {nome: [] for nome in self.schema.names}
+
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(file_path, self.schema, compression="zstd")
+        else:
+            self._writer = self._pa.ipc.new_file(file_path, self.schema)
+
+    def add(self, valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float,
+            resultados: dict):
+        """Adiciona uma linha por produto; o lote é gravado ao atingir batch_size"""
+        b = self._buffers
+        for produto in PRODUTOS:
+            result = resultados[produto]
+            total = result.total_amount(valor)
+            b["produto"].append(produto)
+            b["dias"].append(dias)
+            b["valor"].append(valor)
+            b["di"].append(di)
+            b["taxa_cdb"].append(taxa_cdb)
+            b["taxa_lci"].append(taxa_lci)
+            b["rendimento_bruto"].append(result.interest_amount)
+            b["iof"].append(result.iof_amount)
+            b["ir"].append(result.tax_amount)
+            b["ir_percentual"].append(result.tax_percentage)
+            b["rendimento_liquido"].append(total - valor)
+            b["valor_total"].append(total)
+
+        if len(b["produto"]) >= self.batch_size:
+            self.flush()
+
+    def add_lote(self, valores, dias, di, taxa_cdb, taxa_lci, resultados: dict):
+        """Adiciona os cenários de simular_lote, com as mesmas linhas que add() geraria
+
+        As colunas são montadas diretamente dos arrays NumPy (entradas escalares são
+        expandidas com broadcasting) e gravadas em lotes de até batch_size linhas.
+        """
+        import numpy as np  # Apenas o caminho em lote depende de NumPy
+
+        pa = self._pa
+        self.flush()
+
+        entradas = {"valor": valores, "dias": dias, "di": di, "taxa_cdb": taxa_cdb, "taxa_lci": taxa_lci}
+        campos = [c for r in resultados.values() for c in r.values()]
+        forma = np.broadcast_shapes(*(np.shape(v) for v in (*entradas.values(), *campos)))
+        n = int(np.prod(forma))
+
+        def coluna(v, dtype) -> np.ndarray:
+            return np.broadcast_to(np.asarray(v, dtype=dtype), forma).reshape(n)
+
+        # Uma linha por produto de cada cenário, na ordem de PRODUTOS
+        colunas = {nome: np.repeat(coluna(v, np.float64), len(PRODUTOS)) for nome, v in entradas.items()}
+        colunas["dias"] = np.repeat(coluna(dias, np.int32), len(PRODUTOS))
+        nulos = {}
+        for nome, campo in _CAMPOS_LOTE.items():
+            por_produto = np.full((n, len(PRODUTOS)), np.nan)
+            ausente = np.zeros((n, len(PRODUTOS)), dtype=bool)
+            for i, produto in enumerate(PRODUTOS):
+                if campo in resultados[produto]:
+                    por_produto[:, i] = coluna(resultados[produto][campo], np.float64)
+                else:
+                    ausente[:, i] = True
+            colunas[nome] = por_produto.reshape(-1)
+            nulos[nome] = ausente.reshape(-1)
+        colunas["rendimento_liquido"] = colunas["valor_total"] - colunas["valor"]
+        produtos = np.tile(np.arange(len(PRODUTOS), dtype=np.int8), n)
+
+        for inicio in range(0, n * len(PRODUTOS), self.batch_size):
+            janela = slice(inicio, inicio + self.batch_size)
+            arrays = []
+            for campo in self.schema:
+                if campo.name == "produto":
+                    arrays.append(pa.DictionaryArray.from_arrays(produtos[janela], pa.array(PRODUTOS)))
+                else:
+                    mascara = nulos[campo.name][janela] if campo.name in nulos and nulos[campo.name].any() else None
+                    arrays.append(pa.array(colunas[campo.name][janela], type=campo.type, mask=mascara))
+            self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def flush(self):
+        if not self._buffers["produto"]:
+            return
+        batch = self._pa.RecordBatch.from_pydict(self._buffers, schema=self.schema)
+        self._writer.write_batch(batch)
+        for coluna in self._buffers.values():
+            coluna.clear()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_columnar(file_path: str, simulacoes: Iterable[tuple], formato: str = "parquet",
+                    batch_size: int = 65536) -> str:
+    """Exporta tuplas (valor, dias, di, taxa_cdb, taxa_lci, resultados) em formato colunar"""
+    with ColumnarWriter(file_path, formato, batch_size) as writer:
+        for valor, dias, di, taxa_cdb, taxa_lci, resultados in simulacoes:
+            writer.add(valor, dias, di, taxa_cdb, taxa_lci, resultados)
+    return file_path
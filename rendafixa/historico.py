@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import Optional
+import sqlite3
+import threading
+
+from rendafixa.calculadora import PRODUTOS, InvestmentResult
+from rendafixa.instrumentacao import instrumentation
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS simulacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    criado_em TEXT NOT NULL,
+    valor REAL NOT NULL,
+    dias INTEGER NOT NULL,
+    di REAL NOT NULL,
+    selic REAL,
+    taxa_cdb REAL NOT NULL,
+    taxa_lci REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resultados (
+    simulacao_id INTEGER NOT NULL REFERENCES simulacoes(id) ON DELETE CASCADE,
+    produto TEXT NOT NULL,
+    criado_em TEXT NOT NULL,
+    valor REAL NOT NULL,
+    rendimento_bruto REAL NOT NULL,
+    iof REAL,
+    ir REAL,
+    ir_percentual REAL,
+    rendimento_liquido REAL NOT NULL,
+    valor_total REAL NOT NULL,
+    PRIMARY KEY (simulacao_id, produto)
+);
+CREATE INDEX IF NOT EXISTS idx_simulacoes_criado_em ON simulacoes (criado_em);
+CREATE INDEX IF NOT EXISTS idx_resultados_produto_data ON resultados (produto, criado_em);
+CREATE INDEX IF NOT EXISTS idx_resultados_produto_valor ON resultados (produto, valor);
+"""
+
+
+class SimulationHistory:
+    """Histórico local das simulações em SQLite"""
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def registrar(self, valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float,
+                  resultados: dict, selic: Optional[float] = None,
+                  criado_em: Optional[datetime] = None) -> int:
+        """Grava uma execução de calcular com suas entradas e resultados por produto"""
+        criado_em = (criado_em or datetime.now()).isoformat(timespec="seconds")
+
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO simulacoes (criado_em, valor, dias, di, selic, taxa_cdb, taxa_lci) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (criado_em, valor, dias, di, selic, taxa_cdb, taxa_lci)
+            )
+            simulacao_id = cursor.lastrowid
+
+            linhas = []
+            for produto in PRODUTOS:
+                result: InvestmentResult = resultados[produto]
+                total = result.total_amount(valor)
+                linhas.append((
+                    simulacao_id, produto, criado_em, valor,
+                    result.interest_amount, result.iof_amount, result.tax_amount,
+                    result.tax_percentage, total - valor, total
+                ))
+            self._db.executemany(
+                "INSERT INTO resultados (simulacao_id, produto, criado_em, valor, rendimento_bruto, "
+                "iof, ir, ir_percentual, rendimento_liquido, valor_total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                linhas
+            )
+
+        instrumentation.count("history.registros")
+        return simulacao_id
+
+    def buscar(self, produto: Optional[str] = None, valor_min: Optional[float] = None,
+               valor_max: Optional[float] = None, inicio: Optional[datetime] = None,
+               fim: Optional[datetime] = None, limite: int = 50, offset: int = 0) -> list:
+        """Consulta resultados por produto, faixa de valor e período, do mais recente ao mais antigo"""
+        condicoes = []
+        parametros = []
+        if produto is not None:
+            condicoes.append("r.produto = ?")
+            parametros.append(produto)
+        if valor_min is not None:
+            condicoes.append("r.valor >= ?")
+            parametros.append(valor_min)
+        if valor_max is not None:
+            condicoes.append("r.valor <= ?")
+            parametros.append(valor_max)
+        if inicio is not None:
+            condicoes.append("r.criado_em >= ?")
+            parametros.append(inicio.isoformat(timespec="seconds"))
+        if fim is not None:
+            condicoes.append("r.criado_em < ?")
+            parametros.append(fim.isoformat(timespec="seconds"))
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        sql = (
+            "SELECT r.*, s.dias, s.di, s.selic, s.taxa_cdb, s.taxa_lci "
+            "FROM resultados r JOIN simulacoes s ON s.id = r.simulacao_id "
+            f"{where} ORDER BY r.criado_em DESC, r.simulacao_id DESC LIMIT ? OFFSET ?"
+        )
+        parametros.extend([limite, offset])
+
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, parametros)]
+
+    def contar(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM simulacoes").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+from functools import wraps
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+
+class Instrumentation:
+    """Timers e contadores opcionais para os pontos críticos da aplicação"""
+
+    def __init__(self, enabled: bool = False, profile_actions: bool = False):
+        self.enabled = enabled
+        self.profile_actions = profile_actions
+        self._timers = {}
+        self._counters = {}
+        self._profiles = {}
+        self._profiling = False
+        self._lock = threading.Lock()
+
+    def _record(self, name: str, elapsed_ns: int):
+        with self._lock:
+            t = self._timers.get(name)
+            if t is None:
+                self._timers[name] = [1, elapsed_ns, elapsed_ns, elapsed_ns]
+            else:
+                t[0] += 1
+                t[1] += elapsed_ns
+                t[2] = min(t[2], elapsed_ns)
+                t[3] = max(t[3], elapsed_ns)
+
+    @contextmanager
+    def timer(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter_ns() - start)
+
+    def timed(self, name: str):
+        """Decorador que mede cada chamada; quando desabilitado retorna a função original"""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._record(name, time.perf_counter_ns() - start)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def action(self, name: str):
+        """Mede uma ação da interface e, se configurado, captura um perfil cProfile"""
+        if not self.enabled:
+            yield
+            return
+
+        profiler = None
+        if self.profile_actions:
+            # Só um perfil ativo por vez: um segundo enable() concorrente levanta exceção
+            with self._lock:
+                if not self._profiling:
+                    self._profiling = True
+                    profiler = cProfile.Profile()
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Outro profiler (ex.: de uma ferramenta externa) já está ativo
+                    with self._lock:
+                        self._profiling = False
+                    profiler = None
+        try:
+            with self.timer(name):
+                yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    self._profiling = False
+                output = io.StringIO()
+                pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(25)
+                with self._lock:
+                    self._profiles[name] = output.getvalue()
+
+    def traced_action(self, name: str):
+        """Decorador de handlers da interface; quando desabilitado retorna a função original"""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.action(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self) -> dict:
+        with self._lock:
+            timers = {
+                name: {
+                    "count": count,
+                    "total_ms": total / 1e6,
+                    "mean_ms": total / count / 1e6,
+                    "min_ms": min_ns / 1e6,
+                    "max_ms": max_ns / 1e6,
+                }
+                for name, (count, total, min_ns, max_ns) in self._timers.items()
+            }
+            return {"timers": timers, "counters": dict(self._counters)}
+
+    def profile(self, name: str) -> str:
+        """Relatório cProfile da última execução da ação"""
+        with self._lock:
+            return self._profiles.get(name, "")
+
+    def dump_json(self, file_path: str) -> str:
+        data = self.stats()
+        data["profiles"] = dict(self._profiles)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return file_path
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self._profiles.clear()
+
+
+# Instância global, habilitada por variáveis de ambiente antes da importação dos módulos
+_profile_actions = os.environ.get("RENDAFIXA_CPROFILE") == "1"
+instrumentation = Instrumentation(
+    enabled=_profile_actions or os.environ.get("RENDAFIXA_INSTRUMENT") == "1",
+    profile_actions=_profile_actions,
+)
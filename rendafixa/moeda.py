@@ -0,0 +1,53 @@
+from decimal import Decimal
+from typing import Iterable, Union
+
+# Formatação e leitura de valores em reais sem depender do locale do processo,
+# podendo ser usadas de qualquer thread. O agrupamento "_" do mini-idioma de
+# formatação evita o marcador temporário das três substituições encadeadas.
+
+
+def format_brl(value: Union[float, Decimal], simbolo: bool = True) -> str:
+    """Formata um valor como "R$ 1.234,56" (ou "1.234,56" sem o símbolo)"""
+    if isinstance(value, Decimal):
+        # Decimal não aceita o agrupamento "_"
+        texto = f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    else:
+        texto = f"{value:_.2f}".replace(".", ",").replace("_", ".")
+    return f"R$ {texto}" if simbolo else texto
+
+
+def format_brl_many(values: Iterable[Union[float, Decimal]], simbolo: bool = True) -> list:
+    """Formata vários valores de uma vez, para exportações em massa
+
+    As substituições são feitas uma única vez sobre o texto concatenado,
+    em vez de criar strings intermediárias para cada valor.
+    """
+    prefixo = "R$ " if simbolo else ""
+    texto = f"\n{prefixo}".join([
+        format(v, ",.2f").replace(",", "_") if isinstance(v, Decimal) else format(v, "_.2f")
+        for v in values
+    ])
+    if not texto:
+        return []
+    return (prefixo + texto.replace(".", ",").replace("_", ".")).split("\n")
+
+
+def parse_brl(texto: str) -> float:
+    """Converte "R$ 1.234,56", "1.234,56" ou "1234" para float"""
+    return float(texto.replace("R$", "").replace(".", "").replace(",", "."))
+
+
+def parse_brl_many(textos: Iterable[str]) -> list:
+    """Converte vários valores em reais para float de uma vez
+
+    Retorna um valor para cada texto; textos inválidos (inclusive vazios)
+    levantam ValueError, como em parse_brl.
+    """
+    textos = list(textos)
+    if not textos:
+        return []
+    partes = "\n".join(textos).replace("R$", "").replace(".", "").replace(",", ".").split("\n")
+    if len(partes) != len(textos):
+        # Algum texto contém quebra de linha; converte um a um
+        return [parse_brl(t) for t in textos]
+    return [float(t) for t in partes]
@@ -0,0 +1,146 @@
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+from typing import Optional
+import numpy as np
+
+from rendafixa.calculadora import DIAS_ANIVERSARIO_POUPANCA, FinanceCalculator, InvestmentResult, simular
+from rendafixa.tributos import TaxRules, regras_vigentes
+
+CENT = Decimal("0.01")
+DECIMAL_PRECISION = 34
+
+
+def _to_decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def simular_decimal(valor, dias: int, di, taxa_cdb, taxa_lci,
+                    regras: Optional[TaxRules] = None, rounding: str = ROUND_HALF_EVEN) -> dict:
+    """Mesmas regras de simular() em aritmética Decimal, com arredondamento bancário por centavo"""
+    regras = regras or regras_vigentes()
+
+    with localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        valor = _to_decimal(valor)
+        di = _to_decimal(di)
+
+        def juros(index: Decimal, dias_credito: int) -> Decimal:
+            return (valor * (index ** dias_credito - 1)).quantize(CENT, rounding=rounding)
+
+        def index_lcx(taxa) -> Decimal:
+            return (_to_decimal(taxa) / 100 * di / 100 + 1) ** (Decimal(1) / 365)
+
+        if di > Decimal("8.5"):
+            index_poupanca = (di / 100 / 12 * Decimal("0.7") + 1) ** (Decimal(1) / 30)
+        else:
+            index_poupanca = Decimal("1.005") ** (Decimal(1) / 30)
+        indices = {
+            "poupanca": (index_poupanca, FinanceCalculator.calculate_full_months_days(dias)),
+            "cdb": (index_lcx(taxa_cdb), dias),
+            "lci": (index_lcx(taxa_lci), dias),
+        }
+
+        resultados = {}
+        for produto, (index, dias_credito) in indices.items():
+            regra = regras.produto(produto)
+            result = InvestmentResult(interest_amount=juros(index, dias_credito))
+            if regra.iof:
+                result.iof_amount = (
+                    result.interest_amount * _to_decimal(regras.iof(dias)) / 100
+                ).quantize(CENT, rounding=rounding)
+            if regra.ir:
+                result.tax_percentage = _to_decimal(regras.ir(dias))
+                result.tax_amount = (
+                    (result.interest_amount - (result.iof_amount or 0)) * result.tax_percentage / 100
+                ).quantize(CENT, rounding=rounding)
+            resultados[produto] = result
+
+    return resultados
+
+
+def simular_lote(valores, dias, di, taxa_cdb, taxa_lci, regras: Optional[TaxRules] = None) -> dict:
+    """Versão vetorizada de simular() para simulações em massa
+
+    Aceita escalares ou arrays (com broadcasting) e retorna, por produto, um dicionário
+    de arrays com interest_amount, tax_amount, iof_amount e total_amount.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    dias = np.asarray(dias, dtype=np.int64)
+    di = np.asarray(di, dtype=np.float64)
+    taxa_cdb = np.asarray(taxa_cdb, dtype=np.float64)
+    taxa_lci = np.asarray(taxa_lci, dtype=np.float64)
+
+    def juros(index, dias_credito):
+        return np.round(valores * (np.power(index, dias_credito) - 1), 2)
+
+    def index_lcx(taxa):
+        return np.power((taxa / 100 * di) / 100 + 1, 1 / 365)
+
+    index_poupanca = np.where(
+        di > 8.5,
+        np.power((di / 100 / 12) * 0.7 + 1, 1 / 30),
+        np.power(0.5 / 100 + 1, 1 / 30),
+    )
+    # A poupança rende apenas até o último aniversário completo
+    indices = {
+        "poupanca": (index_poupanca, dias // DIAS_ANIVERSARIO_POUPANCA * DIAS_ANIVERSARIO_POUPANCA),
+        "cdb": (index_lcx(taxa_cdb), dias),
+        "lci": (index_lcx(taxa_lci), dias),
+    }
+
+    regras = regras or regras_vigentes()
+    resultados = {}
+    for produto, (index, dias_credito) in indices.items():
+        regra = regras.produto(produto)
+        interest_amount = juros(index, dias_credito)
+        resultado = {"interest_amount": interest_amount}
+        iof_amount = 0.0
+        if regra.iof:
+            iof_amount = resultado["iof_amount"] = interest_amount * (regras.iof_array(dias) / 100)
+        total_amount = valores + interest_amount
+        if regra.ir:
+            resultado["tax_percentage"] = regras.ir_array(dias)
+            resultado["tax_amount"] = (interest_amount - iof_amount) * (resultado["tax_percentage"] / 100)
+            total_amount = total_amount - resultado["tax_amount"]
+        # Mesma ordem de InvestmentResult.total_amount: IR e depois IOF
+        resultado["total_amount"] = total_amount - iof_amount
+        resultados[produto] = resultado
+    return resultados
+
+
+def verificar_divergencias(valor, dias: int, di, taxa_cdb, taxa_lci,
+                           tolerancia: Decimal = CENT) -> list:
+    """Compara os motores float e Decimal e lista os campos cujo valor em centavos diverge
+
+    O valor float é arredondado para centavos como seria exibido; com a tolerância padrão,
+    qualquer diferença de um centavo ou mais é reportada.
+    """
+    rapido = simular(float(valor), dias, float(di), float(taxa_cdb), float(taxa_lci))
+    exato = simular_decimal(valor, dias, di, taxa_cdb, taxa_lci)
+    investido = _to_decimal(valor)
+
+    divergencias = []
+    for produto, resultado_exato in exato.items():
+        resultado_rapido = rapido[produto]
+        campos = {
+            "interest_amount": (resultado_rapido.interest_amount, resultado_exato.interest_amount),
+            "tax_amount": (resultado_rapido.tax_amount, resultado_exato.tax_amount),
+            "iof_amount": (resultado_rapido.iof_amount, resultado_exato.iof_amount),
+            "total_amount": (
+                resultado_rapido.total_amount(float(valor)),
+                resultado_exato.total_amount(investido),
+            ),
+        }
+        for campo, (valor_rapido, valor_exato) in campos.items():
+            if valor_exato is None:
+                continue
+            exibido = _to_decimal(valor_rapido).quantize(CENT, rounding=ROUND_HALF_EVEN)
+            diferenca = abs(exibido - valor_exato.quantize(CENT, rounding=ROUND_HALF_EVEN))
+            if diferenca >= tolerancia:
+                divergencias.append({
+                    "produto": produto,
+                    "campo": campo,
+                    "float": valor_rapido,
+                    "decimal": valor_exato,
+                    "diferenca": diferenca,
+                })
+    return divergencias
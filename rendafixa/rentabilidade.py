@@ -0,0 +1,125 @@
+from typing import Iterator, Optional
+import math
+
+import numpy as np
+
+from rendafixa.calculadora import DIAS_ANIVERSARIO_POUPANCA, FinanceCalculator
+from rendafixa.tributos import TaxRules, regras_vigentes
+
+DIAS_MES = 30
+
+
+class MonthlySchedule:
+    """Rentabilidade mensal de um produto, gerada sob demanda
+
+    O acumulado de cada mês é o resultado de simular() com resgate no fim daquele
+    mês, então cada linha é calculada diretamente, sem depender das anteriores, e
+    a última coincide com o total do prazo. `fator_liquido` é a fração do
+    rendimento que sobra após IOF e IR no vencimento; com `aniversario`, o
+    rendimento só é creditado a cada aniversário mensal, como na poupança.
+    """
+
+    def __init__(self, valor: float, daily_index: float, dias: int,
+                 fator_liquido: float = 1.0, aniversario: bool = False):
+        self.valor = valor
+        self.daily_index = daily_index
+        self.dias = dias
+        self.fator_liquido = fator_liquido
+        self.meses = math.ceil(dias / DIAS_MES)
+        self._dias_creditados = dias // DIAS_ANIVERSARIO_POUPANCA * DIAS_ANIVERSARIO_POUPANCA if aniversario else dias
+        self._calc = FinanceCalculator()
+
+    def __len__(self) -> int:
+        return self.meses
+
+    def _bruto(self, mes: int) -> float:
+        return self._calc.compound_interest(
+            self.valor, self.daily_index, min(mes * DIAS_MES, self._dias_creditados)
+        )
+
+    def linhas(self, inicio: int = 0, fim: int = None) -> Iterator[dict]:
+        """Linhas dos meses [inicio, fim) (base zero), com as chaves mes, rendimento,
+        rendimento_liquido e valor_acumulado"""
+        fim = self.meses if fim is None else min(fim, self.meses)
+        if inicio >= fim:
+            return
+
+        anterior = self._bruto(inicio)
+        for mes in range(inicio + 1, fim + 1):
+            bruto = self._bruto(mes)
+            rendimento = bruto - anterior
+            anterior = bruto
+            yield {
+                'mes': mes,
+                'rendimento': rendimento,
+                'rendimento_liquido': rendimento * self.fator_liquido,
+                'valor_acumulado': self.valor + bruto * self.fator_liquido,
+            }
+
+
+class DailySchedule:
+    """Rendimento bruto diário de um produto; cada faixa de dias é calculada diretamente
+
+    Com `aniversario`, o saldo só muda a cada aniversário mensal, como na poupança.
+    """
+
+    def __init__(self, valor: float, daily_index: float, dias: int, aniversario: bool = False):
+        self.valor = valor
+        self.daily_index = daily_index
+        self.dias = dias
+        self.aniversario = aniversario
+
+    def __len__(self) -> int:
+        return self.dias
+
+    def linhas(self, inicio: int = 0, fim: int = None) -> Iterator[dict]:
+        """Linhas dos dias [inicio, fim) (base zero), com as chaves dia, rendimento e valor_acumulado"""
+        fim = self.dias if fim is None else min(fim, self.dias)
+        if inicio >= fim:
+            return
+
+        t = np.arange(inicio, fim + 1, dtype=np.int64)
+        if self.aniversario:
+            t = t // DIAS_ANIVERSARIO_POUPANCA * DIAS_ANIVERSARIO_POUPANCA
+        saldos = self.valor * np.power(self.daily_index, t.astype(np.float64))
+        rendimentos = np.diff(saldos)
+        for i, (rendimento, saldo) in enumerate(zip(rendimentos.tolist(), saldos[1:].tolist())):
+            yield {
+                'dia': inicio + i + 1,
+                'rendimento': rendimento,
+                'valor_acumulado': saldo,
+            }
+
+
+def _daily_indexes(di: float, taxa_cdb: float, taxa_lci: float) -> dict:
+    calc = FinanceCalculator()
+    return {
+        "poupanca": calc.get_index_poupanca(di),
+        "cdb": calc.get_index_lcx(taxa_cdb, di),
+        "lci": calc.get_index_lcx(taxa_lci, di),
+    }
+
+
+def monthly_schedules(valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float,
+                      regras: Optional[TaxRules] = None) -> dict:
+    """Rentabilidade mensal de Poupança, CDB/RDB e LCI/LCA, líquida de IOF e IR conforme
+    as regras de cada produto para resgate no vencimento"""
+    regras = regras or regras_vigentes()
+    schedules = {}
+    for produto, index in _daily_indexes(di, taxa_cdb, taxa_lci).items():
+        regra = regras.produto(produto)
+        fator_liquido = 1.0
+        if regra.iof:
+            fator_liquido *= 1 - regras.iof(dias) / 100
+        if regra.ir:
+            fator_liquido *= 1 - regras.ir(dias) / 100
+        schedules[produto] = MonthlySchedule(valor, index, dias, fator_liquido, aniversario=produto == "poupanca")
+    return schedules
+
+
+def daily_schedules(valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float) -> dict:
+    """Rendimento bruto diário de Poupança, CDB/RDB e LCI/LCA"""
+    return {
+        produto: DailySchedule(valor, index, dias, aniversario=produto == "poupanca")
+        for produto, index in _daily_indexes(di, taxa_cdb, taxa_lci).items()
+    }
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+from rendafixa.calculadora import PRODUTOS
+from rendafixa.motores import simular_lote
+from rendafixa.tributos import TaxRules, regras_vigentes
+
+
+@dataclass
+class RedemptionAnalysis:
+    """Valor líquido de cada produto para resgate em cada dia de 1 ao prazo
+
+    `liquido[produto][d - 1]` é o valor líquido no resgate do dia d; `melhor[d - 1]`
+    é o índice em PRODUTOS do produto com maior valor líquido nesse dia.
+    """
+    valor: float
+    dias: np.ndarray
+    liquido: dict
+    melhor: np.ndarray
+
+    def janelas(self) -> list:
+        """Intervalos de dias (produto, primeiro dia, último dia) em que cada produto é o melhor resgate"""
+        if not len(self.dias):
+            return []
+        mudancas = np.flatnonzero(np.diff(self.melhor)) + 1
+        inicios = np.concatenate([[0], mudancas])
+        fins = np.concatenate([mudancas - 1, [len(self.dias) - 1]])
+        return [
+            (PRODUTOS[self.melhor[i]], int(self.dias[i]), int(self.dias[f]))
+            for i, f in zip(inicios, fins)
+        ]
+
+    def cruzamentos(self) -> list:
+        """Dias (dia, produto anterior, novo produto) em que o melhor produto muda"""
+        mudancas = np.flatnonzero(np.diff(self.melhor)) + 1
+        return [
+            (int(self.dias[i]), PRODUTOS[self.melhor[i - 1]], PRODUTOS[self.melhor[i]])
+            for i in mudancas
+        ]
+
+    def no_dia(self, dia: int) -> dict:
+        """Valor líquido de cada produto para resgate no dia informado"""
+        i = min(max(dia, 1), len(self.dias)) - 1
+        return {produto: float(self.liquido[produto][i]) for produto in PRODUTOS}
+
+
+def analisar_resgates(valor: float, dias: int, di: float, taxa_cdb: float, taxa_lci: float,
+                      regras: Optional[TaxRules] = None) -> RedemptionAnalysis:
+    """Simula o resgate em todos os dias de 1 a `dias` em uma única passada vetorizada
+
+    CDB/RDB e LCI/LCA rendem diariamente, com o IOF regressivo e as faixas de IR das
+    regras vigentes; a poupança rende apenas até o último aniversário completo. No
+    último dia, os valores são os mesmos de simular() para o prazo completo.
+    """
+    if dias < 1:
+        raise ValueError("O prazo deve ser maior que zero")
+    regras = regras or regras_vigentes()
+    t = np.arange(1, dias + 1, dtype=np.int64)
+    resultados = simular_lote(valor, t, di, taxa_cdb, taxa_lci, regras)
+    liquido = {
+        produto: np.broadcast_to(resultados[produto]["total_amount"], t.shape)
+        for produto in PRODUTOS
+    }
+    # Em caso de empate, prevalece o primeiro produto na ordem de PRODUTOS
+    melhor = np.argmax(np.stack([liquido[p] for p in PRODUTOS]), axis=0)
+    return RedemptionAnalysis(valor=valor, dias=t, liquido=liquido, melhor=melhor)
@@ -0,0 +1,242 @@
+"""Snapshots reprodutíveis de simulações em lote
+
+Um snapshot é um arquivo NumPy .npz comprimido com as entradas, os resultados de
+cada produto e os metadados da execução (versão das regras tributárias e da série
+de taxas). Cada coluna é um membro separado do arquivo e só é descompactada quando
+lida, então consultar uma coluna ou comparar dois snapshots não exige recalcular
+nem carregar o arquivo inteiro.
+
+Uso:
+    python -m rendafixa.snapshots info lote.npz
+    python -m rendafixa.snapshots diff antes.npz depois.npz
+    python -m rendafixa.snapshots reexecutar lote.npz novo.npz
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+import argparse
+import json
+
+import numpy as np
+
+from rendafixa.calculadora import PRODUTOS
+from rendafixa.motores import simular_lote
+from rendafixa.taxas import carregar_taxas
+from rendafixa.tributos import TaxRules, carregar_regras, regras_vigentes
+
+FORMATO_VERSAO = 1
+ENTRADAS = ("valor", "dias", "di", "taxa_cdb", "taxa_lci")
+
+
+def salvar_snapshot(file_path: str, entradas: dict, resultados: dict, versao_regras: str,
+                    versao_taxas: Optional[str] = None, descricao: str = ""):
+    """Grava entradas e resultados de simular_lote em um .npz comprimido
+
+    Entradas escalares são expandidas com broadcasting, como em simular_lote.
+    """
+    forma = np.broadcast_shapes(*(np.shape(entradas[nome]) for nome in ENTRADAS))
+    n = int(np.prod(forma))
+    arrays = {
+        f"entrada/{nome}": np.broadcast_to(np.asarray(entradas[nome]), forma).reshape(n)
+        for nome in ENTRADAS
+    }
+    for produto in PRODUTOS:
+        for campo, valores in resultados[produto].items():
+            arrays[f"{produto}/{campo}"] = np.broadcast_to(np.asarray(valores, dtype=np.float64), forma).reshape(n)
+
+    meta = {
+        "formato": FORMATO_VERSAO,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "linhas": n,
+        "versao_regras": versao_regras,
+        "versao_taxas": versao_taxas,
+        "descricao": descricao,
+    }
+    arrays["meta"] = np.array(json.dumps(meta))
+    np.savez_compressed(file_path, **arrays)
+
+
+def criar_snapshot(file_path: str, valores, dias, di, taxa_cdb, taxa_lci,
+                   regras: Optional[TaxRules] = None, versao_taxas: Optional[str] = None,
+                   descricao: str = ""):
+    """Executa o lote com simular_lote e grava o snapshot
+
+    Sem `versao_taxas`, registra a versão do snapshot de taxas atual (rendafixa.taxas).
+    """
+    regras = regras or regras_vigentes()
+    if versao_taxas is None:
+        versao_taxas = carregar_taxas().atual().versao
+    entradas = dict(zip(ENTRADAS, (valores, dias, di, taxa_cdb, taxa_lci)))
+    resultados = simular_lote(valores, dias, di, taxa_cdb, taxa_lci, regras)
+    salvar_snapshot(file_path, entradas, resultados, regras.versao, versao_taxas, descricao)
+
+
+class SimulationSnapshot:
+    """Leitura sob demanda de um snapshot; cada coluna é carregada apenas quando acessada"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._npz = np.load(file_path, allow_pickle=False)
+        self.meta = json.loads(str(self._npz["meta"]))
+        if self.meta["formato"] > FORMATO_VERSAO:
+            raise ValueError(f"Snapshot em formato {self.meta['formato']} não suportado")
+
+    def __len__(self) -> int:
+        return self.meta["linhas"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._npz.close()
+
+    def entrada(self, nome: str) -> np.ndarray:
+        return self._npz[f"entrada/{nome}"]
+
+    def entradas(self) -> dict:
+        return {nome: self.entrada(nome) for nome in ENTRADAS}
+
+    def campos(self, produto: str) -> list:
+        prefixo = f"{produto}/"
+        return [nome[len(prefixo):] for nome in self._npz.files if nome.startswith(prefixo)]
+
+    def resultado(self, produto: str, campo: str) -> np.ndarray:
+        return self._npz[f"{produto}/{campo}"]
+
+    def linhas(self, inicio: int = 0, fim: Optional[int] = None, produtos=PRODUTOS) -> dict:
+        """Entradas e resultados das linhas [inicio, fim), para inspeção de poucos cenários"""
+        janela = slice(inicio, fim)
+        return {
+            "entradas": {nome: valores[janela] for nome, valores in self.entradas().items()},
+            **{
+                produto: {campo: self.resultado(produto, campo)[janela] for campo in self.campos(produto)}
+                for produto in produtos
+            },
+        }
+
+    def reexecutar(self, file_path: str, descricao: str = ""):
+        """Recalcula o lote com as mesmas entradas e a mesma versão das regras tributárias"""
+        regras = carregar_regras().por_versao(self.meta["versao_regras"])
+        e = self.entradas()
+        criar_snapshot(
+            file_path, e["valor"], e["dias"], e["di"], e["taxa_cdb"], e["taxa_lci"],
+            regras=regras, versao_taxas=self.meta["versao_taxas"],
+            descricao=descricao or f"Reexecução de {self.meta['criado_em']}",
+        )
+
+
+@dataclass
+class SnapshotDiff:
+    versoes: dict
+    linhas_comparadas: int
+    apenas_a: int
+    apenas_b: int
+    # (produto, campo) -> {"divergentes": n, "max_diferenca": x, "exemplos": [linhas em a]}
+    campos: dict = field(default_factory=dict)
+
+    @property
+    def identicos(self) -> bool:
+        return (
+            not self.apenas_a and not self.apenas_b
+            and all(c["divergentes"] == 0 for c in self.campos.values())
+        )
+
+
+def _alinhar(a: SimulationSnapshot, b: SimulationSnapshot) -> tuple:
+    """Índices das linhas de a e b com as mesmas entradas"""
+    ea, eb = a.entradas(), b.entradas()
+    if len(a) == len(b) and all(np.array_equal(ea[n], eb[n]) for n in ENTRADAS):
+        ids = np.arange(len(a))
+        return ids, ids
+
+    # Entradas em outra ordem ou com cenários diferentes: junta pelas entradas e pela
+    # ocorrência de cada cenário, para que cenários repetidos sejam pareados um a um
+    tipo = [(nome, np.float64) for nome in ENTRADAS] + [("ocorrencia", np.int64)]
+
+    def chaves(e: dict, n: int) -> np.ndarray:
+        registros = np.zeros(n, dtype=tipo)
+        for nome in ENTRADAS:
+            registros[nome] = e[nome]
+        ordem = np.argsort(registros, order=list(ENTRADAS), kind="stable")
+        ordenados = registros[ordem]
+        novo = np.ones(n, dtype=bool)
+        novo[1:] = ordenados[1:] != ordenados[:-1]
+        inicio_grupo = np.maximum.accumulate(np.where(novo, np.arange(n), 0))
+        registros["ocorrencia"][ordem] = np.arange(n) - inicio_grupo
+        return registros
+
+    _, ids_a, ids_b = np.intersect1d(chaves(ea, len(a)), chaves(eb, len(b)), return_indices=True)
+    return ids_a, ids_b
+
+
+def diff_snapshots(a: SimulationSnapshot, b: SimulationSnapshot, tolerancia: float = 0.005,
+                   exemplos: int = 10) -> SnapshotDiff:
+    """Compara os resultados de dois snapshots linha a linha, sem recalcular"""
+    ids_a, ids_b = _alinhar(a, b)
+    diff = SnapshotDiff(
+        versoes={
+            chave: (a.meta.get(chave), b.meta.get(chave))
+            for chave in ("versao_regras", "versao_taxas")
+        },
+        linhas_comparadas=len(ids_a),
+        apenas_a=len(a) - len(ids_a),
+        apenas_b=len(b) - len(ids_b),
+    )
+    for produto in PRODUTOS:
+        for campo in sorted(set(a.campos(produto)) | set(b.campos(produto))):
+            if campo not in a.campos(produto) or campo not in b.campos(produto):
+                diff.campos[(produto, campo)] = {"divergentes": len(ids_a), "max_diferenca": None, "exemplos": []}
+                continue
+            diferenca = np.abs(a.resultado(produto, campo)[ids_a] - b.resultado(produto, campo)[ids_b])
+            divergentes = np.flatnonzero(diferenca > tolerancia)
+            diff.campos[(produto, campo)] = {
+                "divergentes": len(divergentes),
+                "max_diferenca": float(diferenca.max()) if len(diferenca) else 0.0,
+                "exemplos": ids_a[divergentes[:exemplos]].tolist(),
+            }
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    info = sub.add_parser("info", help="Mostra os metadados de um snapshot")
+    info.add_argument("arquivo")
+
+    diff = sub.add_parser("diff", help="Compara os resultados de dois snapshots")
+    diff.add_argument("a")
+    diff.add_argument("b")
+    diff.add_argument("--tolerancia", type=float, default=0.005)
+
+    reexecutar = sub.add_parser("reexecutar", help="Recalcula um snapshot com as mesmas entradas e regras")
+    reexecutar.add_argument("arquivo")
+    reexecutar.add_argument("destino")
+
+    args = parser.parse_args()
+    if args.comando == "info":
+        with SimulationSnapshot(args.arquivo) as snapshot:
+            print(json.dumps(snapshot.meta, indent=2, ensure_ascii=False))
+    elif args.comando == "diff":
+        with SimulationSnapshot(args.a) as a, SimulationSnapshot(args.b) as b:
+            resultado = diff_snapshots(a, b, args.tolerancia)
+        for chave, (va, vb) in resultado.versoes.items():
+            print(f"{chave}: {va} -> {vb}" if va != vb else f"{chave}: {va}")
+        print(f"Linhas comparadas: {resultado.linhas_comparadas} "
+              f"(apenas em A: {resultado.apenas_a}, apenas em B: {resultado.apenas_b})")
+        for (produto, campo), c in resultado.campos.items():
+            if c["divergentes"]:
+                print(f"{produto}.{campo}: {c['divergentes']} divergentes, "
+                      f"máx. {c['max_diferenca']}, linhas {c['exemplos']}")
+        if resultado.identicos:
+            print("Snapshots equivalentes")
+    elif args.comando == "reexecutar":
+        with SimulationSnapshot(args.arquivo) as snapshot:
+            snapshot.reexecutar(args.destino)
+
+
+if __name__ == "__main__":
+    main()
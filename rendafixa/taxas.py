@@ -0,0 +1,226 @@
+from dataclasses import asdict, dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+
+# Valores usados enquanto nenhuma fonte foi consultada
+DI_PADRAO = 12.65
+SELIC_PADRAO = 12.75
+
+
+@dataclass(frozen=True)
+class RateSnapshot:
+    """Taxas DI e SELIC (% ao ano) de uma data de referência, como obtidas da fonte"""
+    di: float
+    selic: float
+    data: str
+    fonte: str
+    obtido_em: float = 0.0
+
+    @property
+    def versao(self) -> str:
+        """Identifica a série de taxas; muda apenas quando os valores ou a data mudam"""
+        payload = json.dumps([f"{self.di:.4f}", f"{self.selic:.4f}", self.data])
+        return f"{self.data or 'padrao'}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:8]}"
+
+
+SNAPSHOT_PADRAO = RateSnapshot(di=DI_PADRAO, selic=SELIC_PADRAO, data="", fonte="padrão")
+
+
+def _validar_data(data: str) -> str:
+    """Aceita apenas datas ISO (AAAA-MM-DD) ou vazio; levanta ValueError nos demais casos"""
+    if data:
+        date.fromisoformat(data)
+    return data
+
+
+def _from_json(dados: dict, fonte: str) -> RateSnapshot:
+    try:
+        return RateSnapshot(
+            di=float(dados["di"]),
+            selic=float(dados["selic"]),
+            data=_validar_data(str(dados.get("data", ""))),
+            fonte=fonte,
+            obtido_em=time.time(),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Taxas inválidas em {fonte}: {e}") from e
+
+
+class RateProvider:
+    """Fonte de taxas; implementações retornam um RateSnapshot ou levantam exceção"""
+
+    nome = "fonte"
+
+    def fetch(self) -> RateSnapshot:
+        raise NotImplementedError
+
+
+class FileRateProvider(RateProvider):
+    """Lê as taxas de um arquivo JSON no formato {"di": 10.4, "selic": 10.5, "data": "2024-06-01"}"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.nome = file_path
+
+    def fetch(self) -> RateSnapshot:
+        with open(self.file_path, encoding="utf-8") as f:
+            return _from_json(json.load(f), self.nome)
+
+
+class HttpRateProvider(RateProvider):
+    """Busca as taxas de um endpoint HTTP que responde o mesmo JSON de FileRateProvider"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self.nome = url
+
+    def fetch(self) -> RateSnapshot:
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as resposta:
+            return _from_json(json.load(resposta), self.nome)
+
+
+class RateCache:
+    """Snapshot das taxas em memória e em disco, atualizado em segundo plano
+
+    atual() nunca espera pela fonte: retorna o snapshot em memória (ou o do disco,
+    ou os valores padrão) e, se ele tiver mais de `ttl` segundos, agenda uma
+    atualização em uma thread. Os callbacks de on_update recebem o novo snapshot.
+    """
+
+    def __init__(self, provider: Optional[RateProvider] = None,
+                 snapshot_path: Optional[str] = None, ttl: float = 3600):
+        self.provider = provider
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.ultimo_erro = None
+        self._snapshot = None
+        self._listeners = []
+        self._atualizando = False
+        self._lock = threading.Lock()
+        self._verificacao = None
+        self._parar = threading.Event()
+
+    def atual(self) -> RateSnapshot:
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._load() or SNAPSHOT_PADRAO
+            snapshot = self._snapshot
+        if self.expirado(snapshot):
+            self.atualizar_em_segundo_plano()
+        return snapshot
+
+    def expirado(self, snapshot: RateSnapshot) -> bool:
+        return self.provider is not None and time.time() - snapshot.obtido_em >= self.ttl
+
+    def atualizar(self) -> RateSnapshot:
+        """Consulta a fonte agora e grava o snapshot; em caso de erro, mantém o anterior"""
+        if self.provider is None:
+            raise ValueError("Nenhuma fonte de taxas configurada")
+        try:
+            snapshot = self.provider.fetch()
+        except Exception as e:
+            self.ultimo_erro = e
+            raise
+        self.ultimo_erro = None
+        with self._lock:
+            anterior = self._snapshot
+            self._snapshot = snapshot
+            self._save(snapshot)
+        if anterior is None or anterior.versao != snapshot.versao:
+            for callback in list(self._listeners):
+                callback(snapshot)
+        return snapshot
+
+    def atualizar_em_segundo_plano(self):
+        with self._lock:
+            if self._atualizando or self.provider is None:
+                return
+            self._atualizando = True
+
+        def tarefa():
+            try:
+                self.atualizar()
+            except Exception:
+                pass  # Mantém o snapshot anterior; o erro fica em ultimo_erro
+            finally:
+                with self._lock:
+                    self._atualizando = False
+
+        threading.Thread(target=tarefa, name="rendafixa-taxas", daemon=True).start()
+
+    def iniciar_verificacao(self, intervalo: Optional[float] = None):
+        """Verifica periodicamente se o snapshot expirou, para processos de longa duração
+
+        Idempotente; sem `intervalo`, verifica a cada min(ttl, 60) segundos.
+        """
+        with self._lock:
+            if self.provider is None or self._verificacao is not None:
+                return
+            intervalo = intervalo or max(1.0, min(self.ttl, 60.0))
+
+            def verificar():
+                while not self._parar.wait(intervalo):
+                    self.atual()
+
+            self._verificacao = threading.Thread(target=verificar, name="rendafixa-taxas-ttl", daemon=True)
+            self._verificacao.start()
+
+    def parar_verificacao(self):
+        self._parar.set()
+
+    def on_update(self, callback: Callable[[RateSnapshot], None]):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[RateSnapshot], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _load(self) -> Optional[RateSnapshot]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = RateSnapshot(**json.load(f))
+            _validar_data(snapshot.data)
+            return snapshot
+        except (OSError, ValueError, TypeError):
+            # Arquivo corrompido ou de formato antigo: volta aos valores padrão até a próxima consulta
+            return None
+
+    def _save(self, snapshot: RateSnapshot):
+        if not self.snapshot_path:
+            return
+        # Grava em um arquivo temporário e troca, para que leitores nunca vejam um arquivo parcial
+        temporario = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(asdict(snapshot), f)
+        os.replace(temporario, self.snapshot_path)
+
+
+def provider_from_source(fonte: Optional[str]) -> Optional[RateProvider]:
+    """Cria o provider para um caminho de arquivo ou uma URL http(s)"""
+    if not fonte:
+        return None
+    if fonte.startswith(("http://", "https://")):
+        return HttpRateProvider(fonte)
+    return FileRateProvider(fonte)
+
+
+@lru_cache(maxsize=None)
+def carregar_taxas() -> RateCache:
+    """Snapshot de taxas compartilhado pelo processo (RENDAFIXA_RATES_SOURCE, _CACHE e _TTL)"""
+    return RateCache(
+        provider=provider_from_source(os.environ.get("RENDAFIXA_RATES_SOURCE")),
+        snapshot_path=os.environ.get(
+            "RENDAFIXA_RATES_CACHE", os.path.join(os.path.expanduser("~"), ".rendafixa_taxas.json")
+        ),
+        ttl=float(os.environ.get("RENDAFIXA_RATES_TTL", 3600)),
+    )
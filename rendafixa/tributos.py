@@ -0,0 +1,148 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import cached_property, lru_cache
+from typing import Optional
+import os
+import tomllib
+
+REGRAS_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regras_tributarias.toml")
+
+# A tabela de IOF cobre os resgates do dia 1 ao 30
+DIAS_IOF = 30
+
+
+@dataclass(frozen=True)
+class ProductTaxRule:
+    ir: bool
+    iof: bool
+
+
+class TaxRules:
+    """Uma versão das regras de IR/IOF compilada em tabelas indexadas pelo dia de resgate"""
+
+    def __init__(self, versao: str, vigencia: date, faixas_ir: list, ir_demais: float,
+                 tabela_iof: list, produtos: dict):
+        prazos = [prazo for prazo, _ in faixas_ir]
+        if prazos != sorted(prazos) or len(set(prazos)) != len(prazos):
+            raise ValueError(f"Regras {versao}: faixas de IR devem estar em ordem crescente de prazo")
+
+        self.versao = versao
+        self.vigencia = vigencia
+        self.produtos = produtos
+
+        # Tabela densa de IR: posição d = alíquota para resgate no dia d; a última vale para os demais
+        ultimo_prazo = prazos[-1] if prazos else 0
+        self._ir = []
+        for dia in range(ultimo_prazo + 2):
+            i = bisect_right(prazos, dia - 1)
+            self._ir.append(float(faixas_ir[i][1]) if i < len(faixas_ir) else float(ir_demais))
+
+        # Tabela densa de IOF: dia 0 e dias após a tabela são isentos
+        self._iof = [0.0] + [float(p) for p in tabela_iof] + [0.0]
+
+    def ir(self, dias: int) -> float:
+        return self._ir[min(max(dias, 0), len(self._ir) - 1)]
+
+    def iof(self, dias: int) -> float:
+        return self._iof[min(max(dias, 0), len(self._iof) - 1)]
+
+    def produto(self, nome: str) -> ProductTaxRule:
+        return self.produtos[nome]
+
+    @cached_property
+    def ir_table(self):
+        import numpy as np
+        return np.array(self._ir, dtype=np.float64)
+
+    @cached_property
+    def iof_table(self):
+        import numpy as np
+        return np.array(self._iof, dtype=np.float64)
+
+    def ir_array(self, dias):
+        """Alíquota de IR para um array de prazos, por consulta direta na tabela"""
+        import numpy as np
+        return self.ir_table[np.clip(dias, 0, len(self._ir) - 1)]
+
+    def iof_array(self, dias):
+        """Alíquota de IOF para um array de prazos, por consulta direta na tabela"""
+        import numpy as np
+        return self.iof_table[np.clip(dias, 0, len(self._iof) - 1)]
+
+
+class TaxRuleBook:
+    """Conjunto de versões das regras, selecionadas pela data de vigência"""
+
+    def __init__(self, versoes: list):
+        if not versoes:
+            raise ValueError("Nenhuma versão de regras tributárias definida")
+        self.versoes = sorted(versoes, key=lambda r: r.vigencia)
+        self._vigencias = [r.vigencia for r in self.versoes]
+
+    @classmethod
+    def load(cls, file_path: str) -> "TaxRuleBook":
+        """Lê e valida o arquivo de regras; erros levantam ValueError com a versão afetada"""
+        from rendafixa.calculadora import PRODUTOS
+
+        with open(file_path, "rb") as f:
+            dados = tomllib.load(f)
+
+        versoes = []
+        for v in dados.get("versao", []):
+            versao = str(v.get("id", "sem id"))
+            try:
+                vigencia = v["vigencia"]
+                # datetime é subclasse de date, mas não pode ser comparado com date
+                if isinstance(vigencia, datetime) or not isinstance(vigencia, date):
+                    raise ValueError(f"vigencia deve ser uma data (AAAA-MM-DD), não {vigencia!r}")
+                faltando = [nome for nome in PRODUTOS if nome not in v.get("produtos", {})]
+                if faltando:
+                    raise ValueError(f"produtos sem regra: {', '.join(faltando)}")
+                if len(v["iof"]["tabela"]) != DIAS_IOF:
+                    raise ValueError(f"a tabela de IOF deve ter {DIAS_IOF} alíquotas, tem {len(v['iof']['tabela'])}")
+                if any(r.versao == versao for r in versoes):
+                    raise ValueError("id repetido")
+
+                produtos = {
+                    nome: ProductTaxRule(ir=bool(p.get("ir", False)), iof=bool(p.get("iof", False)))
+                    for nome, p in v["produtos"].items()
+                }
+                faixas_ir, ir_demais = v["ir"]["faixas"], v["ir"]["demais"]
+            except KeyError as e:
+                raise ValueError(f"Regras {versao} em {file_path}: campo obrigatório ausente: {e}") from e
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Regras {versao} em {file_path}: {e}") from e
+
+            versoes.append(TaxRules(
+                versao=versao,
+                vigencia=vigencia,
+                faixas_ir=faixas_ir,
+                ir_demais=ir_demais,
+                tabela_iof=v["iof"]["tabela"],
+                produtos=produtos,
+            ))
+        return cls(versoes)
+
+    def vigente(self, data: Optional[date] = None) -> TaxRules:
+        data = data or date.today()
+        i = bisect_right(self._vigencias, data)
+        if i == 0:
+            raise ValueError(f"Nenhuma regra tributária vigente em {data:%d/%m/%Y}")
+        return self.versoes[i - 1]
+
+    def por_versao(self, versao: str) -> TaxRules:
+        for regras in self.versoes:
+            if regras.versao == versao:
+                return regras
+        raise ValueError(f"Versão de regras tributárias desconhecida: {versao}")
+
+
+@lru_cache(maxsize=None)
+def carregar_regras(file_path: Optional[str] = None) -> TaxRuleBook:
+    """Carrega e compila as regras uma única vez (RENDAFIXA_TAX_RULES ou o arquivo padrão)"""
+    return TaxRuleBook.load(file_path or os.environ.get("RENDAFIXA_TAX_RULES", REGRAS_PADRAO))
+
+
+def regras_vigentes(data: Optional[date] = None) -> TaxRules:
+    return carregar_regras().vigente(data)
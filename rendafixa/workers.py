@@ -0,0 +1,151 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional
+import threading
+
+from rendafixa.instrumentacao import instrumentation
+
+
+class PoolBusyError(RuntimeError):
+    """Fila da sessão ou do servidor cheia; a tarefa não foi aceita"""
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "chave")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, chave: Optional[Hashable]):
+        self.future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.chave = chave
+
+
+class SessionWorkerPool:
+    """Pool de threads compartilhado entre sessões, com rodízio justo e limite de fila
+
+    Cada sessão tem sua própria fila e executa no máximo uma tarefa por vez, na ordem
+    de envio. Os workers atendem as sessões em rodízio, então uma sessão com muitas
+    tarefas (ou uma tarefa longa, como um PDF de 50 anos) não impede as demais de
+    serem atendidas. Tarefas enviadas com a mesma `chave` substituem a pendente
+    anterior da sessão.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending_per_session: int = 4,
+                 max_pending: int = 1000):
+        self.max_workers = max_workers
+        self.max_pending_per_session = max_pending_per_session
+        self.max_pending = max_pending
+        self._queues = OrderedDict()
+        self._running = {}
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._shutdown = False
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"rendafixa-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, session_id: Hashable, fn: Callable, *args,
+               chave: Optional[Hashable] = None, **kwargs) -> Future:
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Pool encerrado")
+
+            fila = self._queues.setdefault(session_id, deque())
+            if chave is not None:
+                for i, pendente in enumerate(fila):
+                    if pendente.chave == chave:
+                        # Apenas o pedido mais recente interessa (ex.: recálculo a cada tecla)
+                        pendente.future.cancel()
+                        del fila[i]
+                        self._pending -= 1
+                        break
+
+            if len(fila) >= self.max_pending_per_session or self._pending >= self.max_pending:
+                self._rejected += 1
+                instrumentation.count("worker_pool.rejected")
+                if not fila:
+                    del self._queues[session_id]
+                raise PoolBusyError("Servidor ocupado, tente novamente em instantes")
+
+            task = _Task(fn, args, kwargs, chave)
+            fila.append(task)
+            self._pending += 1
+            self._cond.notify()
+            return task.future
+
+    def _next_task(self) -> Optional[tuple]:
+        # Rodízio: a primeira sessão com tarefa pendente e sem tarefa em execução vai para o fim
+        for session_id in list(self._queues):
+            if self._running.get(session_id):
+                continue
+            fila = self._queues.pop(session_id)
+            task = fila.popleft()
+            if fila:
+                self._queues[session_id] = fila
+            self._running[session_id] = self._running.get(session_id, 0) + 1
+            self._pending -= 1
+            return session_id, task
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                proxima = self._next_task()
+                while proxima is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    proxima = self._next_task()
+            session_id, task = proxima
+
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.fn(*task.args, **task.kwargs))
+                    except BaseException as exc:
+                        task.future.set_exception(exc)
+            finally:
+                with self._cond:
+                    self._running[session_id] -= 1
+                    if not self._running[session_id]:
+                        del self._running[session_id]
+                    self._completed += 1
+                    # A sessão pode ter ficado elegível novamente
+                    self._cond.notify_all()
+
+    def cancel_session(self, session_id: Hashable):
+        """Descarta as tarefas pendentes de uma sessão encerrada"""
+        with self._cond:
+            fila = self._queues.pop(session_id, None)
+            for task in fila or ():
+                task.future.cancel()
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "sessions_waiting": len(self._queues),
+                "running": sum(self._running.values()),
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._shutdown = True
+            for session_id in list(self._queues):
+                for task in self._queues.pop(session_id):
+                    task.future.cancel()
+            self._pending = 0
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
@@ -0,0 +1,14 @@
+import os
+
+from hypothesis import HealthCheck, settings
+
+# "padrao" roda em segundos; "completo" é para validar um motor novo antes de adotá-lo:
+#   HYPOTHESIS_PROFILE=completo RENDAFIXA_TEST_CASOS=2000000 poetry run pytest
+settings.register_profile("padrao", max_examples=300, deadline=None)
+settings.register_profile(
+    "completo",
+    max_examples=20_000,
+    deadline=None,
+    suppress_health_check=[HealthCheck.too_slow],
+)
+settings.load_profile(os.environ.get("HYPOTHESIS_PROFILE", "padrao"))
@@ -0,0 +1,72 @@
+from datetime import date
+
+from rendafixa import cache as cache_module
+from rendafixa.cache import ResultCache, cache_key
+from rendafixa.calculadora import simular, tax_schedule_version
+from rendafixa.tributos import TaxRules, regras_vigentes
+
+CENARIO = (1000.0, 200, 12.65, 110.0, 90.0)
+
+
+def _regras_futuras() -> TaxRules:
+    atuais = regras_vigentes()
+    return TaxRules(
+        versao="2099.1", vigencia=date(2099, 1, 1), faixas_ir=[[360, 25.0]], ir_demais=20.0,
+        tabela_iof=[0] * 30, produtos=atuais.produtos,
+    )
+
+
+def test_chave_normaliza_entradas():
+    versao = tax_schedule_version()
+    assert cache_key(1000, 360, 12.65, 100, 100, versao) == cache_key(1000.0, 360, 12.650, 100.0, 100.00, versao)
+    assert cache_key(1000, 360, 12.65, 100, 100, versao) != cache_key(1000, 360, 12.65, 100, 100, "outra")
+
+
+def test_valor_arredondado_para_centavos_na_chave_e_no_calculo():
+    cache = ResultCache()
+    resultado = cache.simular(1000.004, 200, 12.65, 110.0, 90.0)
+    assert resultado == simular(*CENARIO)
+    # Valores com a mesma chave recebem o resultado calculado para o valor em centavos
+    assert cache.simular(999.996, 200, 12.65, 110.0, 90.0) is resultado
+
+
+def test_nova_versao_das_regras_invalida_o_cache(tmp_path, monkeypatch):
+    cache = ResultCache(db_path=str(tmp_path / "cache.db"))
+    antes = cache.simular(*CENARIO)
+    assert antes["cdb"].tax_percentage == 20.0
+    assert cache.simular(*CENARIO) is antes
+
+    # Uma versão com data futura entra em vigor com o servidor em execução
+    futuras = _regras_futuras()
+    monkeypatch.setattr(cache_module, "regras_vigentes", lambda data=None: futuras)
+    depois = cache.simular(*CENARIO)
+    assert depois["cdb"].tax_percentage == 25.0
+    assert depois == simular(*CENARIO, regras=futuras)
+    assert cache.versao == tax_schedule_version(futuras)
+
+    # Os resultados da versão anterior foram descartados também do disco
+    versoes = {v for (v,) in cache._db.execute("SELECT DISTINCT versao FROM resultados")}
+    assert versoes == {tax_schedule_version(futuras)}
+    cache.close()
+
+
+def test_versao_fixa(monkeypatch):
+    cache = ResultCache(versao="fixa")
+    primeiro = cache.simular(*CENARIO)
+    monkeypatch.setattr(cache_module, "regras_vigentes", lambda data=None: _regras_futuras())
+    assert cache.simular(*CENARIO) is primeiro
+
+
+def test_invalidate_mantem_a_deteccao_de_novas_versoes(tmp_path, monkeypatch):
+    cache = ResultCache(db_path=str(tmp_path / "cache.db"))
+    antes = cache.simular(*CENARIO)
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
+    assert cache._db.execute("SELECT COUNT(*) FROM resultados").fetchone()[0] == 0
+    assert cache.simular(*CENARIO) is not antes
+
+    futuras = _regras_futuras()
+    monkeypatch.setattr(cache_module, "regras_vigentes", lambda data=None: futuras)
+    assert cache.simular(*CENARIO)["cdb"].tax_percentage == 25.0
+    assert cache.versao == tax_schedule_version(futuras)
+    cache.close()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from rendafixa.calculadora import PRODUTOS, simular
+from rendafixa.exportacao import ColumnarWriter
+from rendafixa.motores import simular_lote
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _ler(caminho: str, formato: str):
+    if formato == "parquet":
+        return pq.read_table(caminho)
+    with pa.memory_map(caminho) as fonte:
+        return pa.ipc.open_file(fonte).read_all()
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_add_lote_grava_as_mesmas_linhas_que_add(tmp_path, formato):
+    rng = np.random.default_rng(11)
+    n = 250
+    valores = np.round(rng.uniform(100, 1e6, n), 2)
+    dias = rng.integers(1, 3650, n)
+    di = np.round(rng.uniform(2, 15, n), 2)
+    taxa_cdb, taxa_lci = 110.0, 92.0
+
+    lote = str(tmp_path / f"lote.{formato}")
+    # batch_size pequeno para gravar vários lotes, um deles parcial
+    with ColumnarWriter(lote, formato, batch_size=64) as writer:
+        writer.add_lote(valores, dias, di, taxa_cdb, taxa_lci, simular_lote(valores, dias, di, taxa_cdb, taxa_lci))
+
+    escalar = str(tmp_path / f"escalar.{formato}")
+    with ColumnarWriter(escalar, formato) as writer:
+        for cenario in zip(valores.tolist(), dias.tolist(), di.tolist()):
+            writer.add(*cenario, taxa_cdb, taxa_lci, simular(*cenario, taxa_cdb, taxa_lci))
+
+    obtido, esperado = _ler(lote, formato), _ler(escalar, formato)
+    assert obtido.schema == esperado.schema
+    assert obtido.num_rows == 3 * n
+    assert obtido.column("produto").to_pylist() == list(PRODUTOS) * n
+    for coluna in ("dias", "valor", "di", "taxa_cdb", "taxa_lci"):
+        assert obtido.column(coluna).to_pylist() == esperado.column(coluna).to_pylist()
+    for coluna in ("rendimento_bruto", "iof", "ir", "ir_percentual", "rendimento_liquido", "valor_total"):
+        a, b = obtido.column(coluna).to_pylist(), esperado.column(coluna).to_pylist()
+        # Nulos nas mesmas linhas (produtos sem IR ou IOF) e valores até um centavo
+        assert [v is None for v in a] == [v is None for v in b], coluna
+        assert all(abs(x - y) <= 0.01 + 1e-6 for x, y in zip(a, b) if x is not None), coluna
+
+
+def test_add_lote_com_entradas_escalares(tmp_path):
+    caminho = str(tmp_path / "prazos.parquet")
+    dias = np.arange(1, 31)
+    with ColumnarWriter(caminho) as writer:
+        writer.add(1000.0, 360, 12.65, 110.0, 92.0, simular(1000.0, 360, 12.65, 110.0, 92.0))
+        writer.add_lote(1000.0, dias, 12.65, 110.0, 92.0, simular_lote(1000.0, dias, 12.65, 110.0, 92.0))
+
+    tabela = pq.read_table(caminho)
+    assert tabela.num_rows == 3 * 31
+    # A linha de add() pendente é gravada antes do lote
+    assert tabela.column("dias").to_pylist() == [360] * 3 + np.repeat(dias, 3).tolist()
+    assert set(tabela.column("valor").to_pylist()) == {1000.0}
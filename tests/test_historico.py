@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from rendafixa.calculadora import PRODUTOS, simular
+from rendafixa.historico import SimulationHistory
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = SimulationHistory(str(tmp_path / "historico.db"))
+    yield history
+    history.close()
+
+
+def _registrar(history, valor, dia, dias=360, selic=None):
+    resultados = simular(valor, dias, 12.65, 110.0, 92.0)
+    return history.registrar(valor, dias, 12.65, 110.0, 92.0, resultados, selic=selic,
+                             criado_em=datetime(2026, 9, dia, 12))
+
+
+def test_registrar_grava_entradas_e_resultados(history):
+    resultados = simular(1000.0, 360, 12.65, 110.0, 92.0)
+    simulacao_id = history.registrar(1000.0, 360, 12.65, 110.0, 92.0, resultados, selic=12.75)
+    assert history.contar() == 1
+
+    linhas = {linha["produto"]: linha for linha in history.buscar()}
+    assert set(linhas) == set(PRODUTOS)
+    cdb = linhas["cdb"]
+    assert cdb["simulacao_id"] == simulacao_id
+    assert (cdb["valor"], cdb["dias"], cdb["di"], cdb["selic"], cdb["taxa_cdb"], cdb["taxa_lci"]) == \
+        (1000.0, 360, 12.65, 12.75, 110.0, 92.0)
+    assert cdb["rendimento_bruto"] == resultados["cdb"].interest_amount
+    assert cdb["ir_percentual"] == resultados["cdb"].tax_percentage
+    assert cdb["valor_total"] == pytest.approx(resultados["cdb"].total_amount(1000.0))
+    assert cdb["rendimento_liquido"] == pytest.approx(cdb["valor_total"] - 1000.0)
+    assert linhas["lci"]["ir"] is None and linhas["lci"]["iof"] is None
+
+
+def test_buscar_filtra_por_produto_valor_e_periodo(history):
+    for dia, valor in enumerate((500.0, 1000.0, 5000.0, 20000.0), start=1):
+        _registrar(history, valor, dia)
+
+    assert [l["valor"] for l in history.buscar(produto="cdb")] == [20000.0, 5000.0, 1000.0, 500.0]
+    assert {l["produto"] for l in history.buscar(produto="lci")} == {"lci"}
+    assert [l["valor"] for l in history.buscar(produto="cdb", valor_min=1000, valor_max=5000)] == [5000.0, 1000.0]
+    # O fim do período é exclusivo
+    periodo = history.buscar(produto="cdb", inicio=datetime(2026, 9, 2), fim=datetime(2026, 9, 4, 12))
+    assert [l["valor"] for l in periodo] == [5000.0, 1000.0]
+    assert history.buscar(produto="cdb", valor_min=1e6) == []
+
+
+def test_buscar_pagina_do_mais_recente_ao_mais_antigo(history):
+    ids = [_registrar(history, 1000.0 + i, 1 + i) for i in range(7)]
+    assert history.contar() == 7
+
+    paginas = [history.buscar(produto="poupanca", limite=3, offset=offset) for offset in (0, 3, 6, 9)]
+    assert [len(p) for p in paginas] == [3, 3, 1, 0]
+    assert [l["simulacao_id"] for p in paginas for l in p] == ids[::-1]
+
+    # Na mesma data, a simulação mais recente vem primeiro
+    mesma_data = [_registrar(history, 1.0, 28) for _ in range(2)]
+    assert [l["simulacao_id"] for l in history.buscar(produto="cdb", limite=2)] == mesma_data[::-1]
@@ -0,0 +1,19 @@
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências pesadas que só devem ser carregadas no primeiro uso
+ADIADOS = ("numpy", "fpdf", "pyarrow")
+
+
+def test_import_main_nao_carrega_dependencias_pesadas(tmp_path):
+    script = f"import json, sys; import main; print(json.dumps([m for m in {ADIADOS!r} if m in sys.modules]))"
+    saida = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+        env={**os.environ, "HOME": str(tmp_path)},
+    ).stdout
+    assert json.loads(saida.strip().splitlines()[-1]) == []
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from rendafixa import cache as cache_module, historico, workers
+from rendafixa.cache import ResultCache
+from rendafixa.calculadora import simular
+from rendafixa.historico import SimulationHistory
+from rendafixa.instrumentacao import Instrumentation
+from rendafixa.workers import PoolBusyError, SessionWorkerPool
+
+
+@pytest.fixture
+def instrumentation(monkeypatch):
+    instancia = Instrumentation(enabled=True)
+    for modulo in (cache_module, historico, workers):
+        monkeypatch.setattr(modulo, "instrumentation", instancia)
+    return instancia
+
+
+def test_contadores_de_cache_pool_e_historico(instrumentation, tmp_path):
+    cache = ResultCache(db_path=str(tmp_path / "cache.db"))
+    cache.simular(1000.0, 360, 12.65, 110.0, 92.0)
+    cache.simular(1000.0, 360, 12.65, 110.0, 92.0)
+    cache.close()
+    cache = ResultCache(db_path=str(tmp_path / "cache.db"))
+    cache.simular(1000.0, 360, 12.65, 110.0, 92.0)
+    cache.close()
+
+    history = SimulationHistory(str(tmp_path / "historico.db"))
+    history.registrar(1000.0, 360, 12.65, 110.0, 92.0, simular(1000.0, 360, 12.65, 110.0, 92.0))
+    history.close()
+
+    liberar = threading.Event()
+    pool = SessionWorkerPool(max_workers=1, max_pending_per_session=1)
+    try:
+        pool.submit("s", liberar.wait)
+        while not pool.stats()["running"]:
+            time.sleep(0.001)
+        pool.submit("s", liberar.wait)  # ocupa a única vaga da fila da sessão
+        with pytest.raises(PoolBusyError):
+            pool.submit("s", liberar.wait)
+    finally:
+        liberar.set()
+        pool.shutdown()
+
+    assert instrumentation.stats()["counters"] == {
+        "result_cache.misses": 1,
+        "result_cache.hits_memory": 1,
+        "result_cache.hits_disk": 1,
+        "history.registros": 1,
+        "worker_pool.rejected": 1,
+    }
+
+
+def test_acoes_concorrentes_com_cprofile():
+    instrumentation = Instrumentation(enabled=True, profile_actions=True)
+    inicio = threading.Barrier(8)
+
+    def acao(i):
+        inicio.wait()
+        with instrumentation.action("calcular"):
+            sum(range(20_000))
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(acao, range(8)))
+
+    assert instrumentation.stats()["timers"]["calcular"]["count"] == 8
+    assert "function calls" in instrumentation.profile("calcular")
+    assert not instrumentation._profiling
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+from hypothesis import given, strategies as st
+
+from rendafixa.moeda import format_brl, format_brl_many, parse_brl, parse_brl_many
+
+floats = st.floats(min_value=-1e12, max_value=1e12, allow_nan=False)
+decimais = st.decimals(min_value="-1000000000", max_value="1000000000", places=4)
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (0, "R$ 0,00"),
+    (0.005, "R$ 0,01"),
+    (1234.5, "R$ 1.234,50"),
+    (-1234.5, "R$ -1.234,50"),
+    (1_000_000, "R$ 1.000.000,00"),
+    (1_234_567_890.12, "R$ 1.234.567.890,12"),
+    (Decimal("0"), "R$ 0,00"),
+    (Decimal("-9876543.215"), "R$ -9.876.543,22"),
+    (Decimal("1000000.5"), "R$ 1.000.000,50"),
+])
+def test_format_brl(valor, esperado):
+    assert format_brl(valor) == esperado
+    assert format_brl(valor, simbolo=False) == esperado[3:]
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("R$ 1.234,56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("1234", 1234.0),
+    ("0", 0.0),
+    ("R$ -1.000.000,01", -1000000.01),
+])
+def test_parse_brl(texto, esperado):
+    assert parse_brl(texto) == esperado
+
+
+@given(floats)
+def test_ida_e_volta_float(valor):
+    assert parse_brl(format_brl(valor)) == round(valor, 2)
+
+
+@given(decimais)
+def test_ida_e_volta_decimal(valor):
+    assert parse_brl(format_brl(valor)) == float(valor.quantize(Decimal("0.01")))
+
+
+@given(st.lists(st.one_of(floats, decimais)), st.booleans())
+def test_format_brl_many_igual_a_format_brl(valores, simbolo):
+    assert format_brl_many(valores, simbolo) == [format_brl(v, simbolo) for v in valores]
+
+
+@given(st.lists(st.one_of(floats, decimais)))
+def test_parse_brl_many_igual_a_parse_brl(valores):
+    textos = format_brl_many(valores)
+    assert parse_brl_many(textos) == [parse_brl(t) for t in textos]
+
+
+def test_parse_brl_many_mantem_uma_saida_por_entrada():
+    assert parse_brl_many([]) == []
+    assert parse_brl_many(iter(["1,00", "R$ 2,50"])) == [1.0, 2.5]
+    assert parse_brl_many(["1,00\n"]) == [parse_brl("1,00\n")]
+    for textos in ([""], ["1,00", ""], ["abc"]):
+        with pytest.raises(ValueError):
+            parse_brl(textos[-1])
+        with pytest.raises(ValueError):
+            parse_brl_many(textos)
@@ -0,0 +1,218 @@
+"""Testes diferenciais: todos os caminhos de cálculo devem concordar com simular() em até um centavo"""
+from decimal import Decimal
+import os
+
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st
+
+from rendafixa.cache import ResultCache
+from rendafixa.calculadora import PRODUTOS, InvestmentCalculator, simular
+from rendafixa.motores import simular_decimal, simular_lote
+from rendafixa.rentabilidade import daily_schedules, monthly_schedules
+from rendafixa.resgate import analisar_resgates
+from rendafixa.series import saldo_diario
+from rendafixa.tributos import regras_vigentes
+
+# Folga para o erro de representação binária em valores na casa dos milhões
+CENTAVO = 0.01 + 1e-6
+CAMPOS = ("interest_amount", "tax_amount", "iof_amount", "total_amount")
+
+# Quantidade de cenários do teste em massa; use milhões para validar um motor novo
+CASOS = int(os.environ.get("RENDAFIXA_TEST_CASOS", 200_000))
+
+
+def _mudancas_de_aliquota() -> list:
+    regras = regras_vigentes()
+    return [d for d in range(1, 4000) if regras.ir(d) != regras.ir(d - 1) or regras.iof(d) != regras.iof(d - 1)]
+
+
+# Dias em que IR ou IOF mudam e seus vizinhos, além de todo o período com IOF
+DIAS_LIMITE = sorted({
+    d for limite in _mudancas_de_aliquota() for d in (limite - 1, limite, limite + 1) if d >= 1
+} | set(range(1, 32)))
+
+valores = st.decimals(min_value="0.01", max_value="10000000", places=2).map(float)
+dias = st.one_of(st.sampled_from(DIAS_LIMITE), st.integers(min_value=1, max_value=3650))
+# 8.5% separa as duas regras da poupança
+taxas_di = st.one_of(
+    st.sampled_from([8.49, 8.5, 8.51]),
+    st.decimals(min_value="0.01", max_value="30", places=2).map(float),
+)
+taxas_produto = st.decimals(min_value="50", max_value="200", places=1).map(float)
+cenarios = st.tuples(valores, dias, taxas_di, taxas_produto, taxas_produto)
+
+
+def _campos(resultado, valor: float) -> dict:
+    return {
+        "interest_amount": resultado.interest_amount,
+        "tax_amount": resultado.tax_amount or 0,
+        "iof_amount": resultado.iof_amount or 0,
+        "total_amount": resultado.total_amount(valor),
+    }
+
+
+def assert_centavo(esperado: dict, obtido: dict, contexto, exibido: bool = False):
+    """Com `exibido`, compara os valores arredondados para centavos, como aparecem na tela"""
+    for campo in CAMPOS:
+        a, b = float(esperado[campo]), float(obtido[campo])
+        if exibido:
+            a, b = round(a, 2), round(b, 2)
+        assert abs(a - b) <= CENTAVO, (contexto, campo, esperado, obtido)
+
+
+def test_dias_limite_cobrem_faixas_de_ir_e_iof():
+    for limite in (30, 31, 180, 181, 360, 361, 720, 721):
+        assert limite in DIAS_LIMITE
+
+
+@given(cenarios)
+def test_investment_calculator(cenario):
+    valor, prazo, di, taxa_cdb, taxa_lci = cenario
+    referencia = simular(*cenario)
+    calc = InvestmentCalculator()
+
+    poupanca = calc.calculate_poupanca(valor, di, prazo)
+    assert poupanca["interest_amount"] == referencia["poupanca"].interest_amount
+
+    cdb = calc.calculate_cdb(valor, di, taxa_cdb, prazo)
+    assert cdb["interest_amount"] == referencia["cdb"].interest_amount
+    assert cdb["tax_percentage"] == referencia["cdb"].tax_percentage
+    assert abs(cdb["tax_amount"] - referencia["cdb"].tax_amount) <= CENTAVO
+    assert abs(cdb["iof_amount"] - referencia["cdb"].iof_amount) <= CENTAVO
+    assert calc.calculate_lcx(valor, di, taxa_lci, prazo)["interest_amount"] == referencia["lci"].interest_amount
+
+
+_cache_memoria = ResultCache(max_size=64)
+
+
+@given(cenarios)
+def test_cache_em_memoria(cenario):
+    referencia = simular(*cenario)
+    for _ in range(2):  # cálculo e acerto
+        resultado = _cache_memoria.simular(*cenario)
+        for produto in PRODUTOS:
+            assert resultado[produto] == referencia[produto]
+
+
+def test_cache_em_disco(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    amostra = [
+        (1000.0, d, 12.65, 110.0, 92.5) for d in DIAS_LIMITE
+    ] + [(123456.78, 365, 8.5, 100.0, 90.0)]
+
+    cache = ResultCache(db_path=db_path)
+    for cenario in amostra:
+        cache.simular(*cenario)
+    cache.close()
+
+    cache = ResultCache(db_path=db_path)
+    for cenario in amostra:
+        referencia = simular(*cenario)
+        resultado = cache.simular(*cenario)
+        for produto in PRODUTOS:
+            assert resultado[produto] == referencia[produto]
+    assert cache.stats()["hits_disk"] == len(amostra)
+    cache.close()
+
+
+@given(cenarios)
+def test_simular_lote_escalar(cenario):
+    valor = cenario[0]
+    referencia = simular(*cenario)
+    lote = simular_lote(*cenario)
+    for produto in PRODUTOS:
+        obtido = {campo: lote[produto].get(campo, 0) for campo in CAMPOS}
+        assert_centavo(_campos(referencia[produto], valor), obtido, (cenario, produto))
+
+
+@given(cenarios)
+def test_simular_decimal(cenario):
+    valor = cenario[0]
+    referencia = simular(*cenario)
+    exato = simular_decimal(*(str(v) if isinstance(v, float) else v for v in cenario))
+    for produto in PRODUTOS:
+        assert_centavo(
+            _campos(referencia[produto], valor),
+            _campos(exato[produto], Decimal(str(valor))),
+            (cenario, produto),
+            # Um rendimento exatamente em meio centavo pode arredondar para lados opostos
+            # e o IR sobre essa diferença levaria o total bruto um pouco além de um centavo
+            exibido=True,
+        )
+
+
+def test_simular_lote_em_massa():
+    rng = np.random.default_rng(20240601)
+    n = CASOS
+    prazos = np.where(
+        rng.random(n) < 0.25,
+        rng.choice(DIAS_LIMITE, n),
+        rng.integers(1, 3651, n),
+    )
+    colunas = (
+        np.round(rng.uniform(0.01, 1_000_000, n), 2),
+        prazos,
+        np.round(rng.uniform(0.01, 30, n), 2),
+        np.round(rng.uniform(50, 200, n), 1),
+        np.round(rng.uniform(50, 200, n), 1),
+    )
+    lote = simular_lote(*colunas)
+
+    # A referência escalar é o custo dominante; compara uma amostra fixa de até 20 mil cenários
+    ids = rng.choice(n, min(n, 20_000), replace=False)
+    for i in ids:
+        cenario = tuple(c[i].item() for c in colunas)
+        referencia = simular(*cenario)
+        for produto in PRODUTOS:
+            obtido = {campo: np.broadcast_to(lote[produto].get(campo, 0), (n,))[i] for campo in CAMPOS}
+            assert_centavo(_campos(referencia[produto], cenario[0]), obtido, (cenario, produto))
+
+    # Nos demais, invariantes que valem para qualquer cenário
+    cdb = lote["cdb"]
+    assert np.all(cdb["iof_amount"] <= cdb["interest_amount"] + CENTAVO)
+    assert np.all(cdb["total_amount"] <= colunas[0] + cdb["interest_amount"] + CENTAVO)
+    assert np.all(lote["lci"]["total_amount"] == colunas[0] + lote["lci"]["interest_amount"])
+
+
+@pytest.mark.parametrize("di", [8.5, 12.65])
+def test_analise_de_resgate(di):
+    prazo = 800
+    valor, taxa_cdb, taxa_lci = 5432.10, 115.0, 93.0
+    analise = analisar_resgates(valor, prazo, di, taxa_cdb, taxa_lci)
+
+    for dia in sorted(set(DIAS_LIMITE) & set(range(1, prazo + 1)) | {prazo, 59, 60, 61}):
+        referencia = simular(valor, dia, di, taxa_cdb, taxa_lci)
+        no_dia = analise.no_dia(dia)
+        for produto in PRODUTOS:
+            assert abs(no_dia[produto] - referencia[produto].total_amount(valor)) <= CENTAVO, (dia, produto)
+
+
+@pytest.mark.parametrize("prazo", [1, 29, 30, 45, 365, 800, 3650])
+@pytest.mark.parametrize("di", [8.5, 12.65])
+def test_rentabilidade_concorda_com_simular(prazo, di):
+    valor, taxa_cdb, taxa_lci = 5432.10, 115.0, 93.0
+    mensal = monthly_schedules(valor, prazo, di, taxa_cdb, taxa_lci)
+    diaria = daily_schedules(valor, prazo, di, taxa_cdb, taxa_lci)
+    referencia = simular(valor, prazo, di, taxa_cdb, taxa_lci)
+    dias_serie, series = saldo_diario(valor, prazo, di, taxa_cdb, taxa_lci)
+
+    for produto in PRODUTOS:
+        linhas = list(mensal[produto].linhas())
+        assert len(linhas) == len(mensal[produto])
+        # O acumulado do último mês é o total líquido do prazo
+        assert abs(linhas[-1]["valor_acumulado"] - referencia[produto].total_amount(valor)) <= CENTAVO, produto
+        assert abs(sum(l["rendimento"] for l in linhas) - referencia[produto].interest_amount) <= CENTAVO, produto
+        # Uma janela no meio gera as mesmas linhas da tabela completa
+        assert list(mensal[produto].linhas(len(linhas) // 2, len(linhas))) == linhas[len(linhas) // 2:]
+
+        for linha in diaria[produto].linhas():
+            bruto = valor + simular(valor, linha["dia"], di, taxa_cdb, taxa_lci)[produto].interest_amount
+            assert abs(linha["valor_acumulado"] - bruto) <= CENTAVO, (produto, linha["dia"])
+            assert abs(series[produto][linha["dia"]] - bruto) <= CENTAVO, (produto, linha["dia"])
+
+    # Sem IR e IOF, o acumulado da LCI no fim de cada mês é o resgate naquele dia
+    for linha in mensal["lci"].linhas():
+        dia = min(linha["mes"] * 30, prazo)
+        assert abs(linha["valor_acumulado"] - simular(valor, dia, di, taxa_cdb, taxa_lci)["lci"].total_amount(valor)) <= CENTAVO
+
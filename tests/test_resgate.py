@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from rendafixa.calculadora import PRODUTOS
+from rendafixa.resgate import RedemptionAnalysis, analisar_resgates
+
+
+def _analise(melhor: list) -> RedemptionAnalysis:
+    dias = np.arange(1, len(melhor) + 1)
+    liquido = {produto: np.zeros(len(melhor)) for produto in PRODUTOS}
+    return RedemptionAnalysis(valor=1000.0, dias=dias, liquido=liquido, melhor=np.array(melhor))
+
+
+def test_janelas_e_cruzamentos():
+    analise = _analise([0, 0, 1, 1, 1, 2])
+    assert analise.janelas() == [("poupanca", 1, 2), ("cdb", 3, 5), ("lci", 6, 6)]
+    assert analise.cruzamentos() == [(3, "poupanca", "cdb"), (6, "cdb", "lci")]
+
+
+def test_um_unico_produto_em_todo_o_prazo():
+    analise = _analise([2] * 10)
+    assert analise.janelas() == [("lci", 1, 10)]
+    assert analise.cruzamentos() == []
+
+
+def test_janelas_seguem_o_maior_valor_liquido():
+    # Com IOF e IR na faixa mais alta, a LCI vence no início e o CDB depois
+    analise = analisar_resgates(1000.0, 800, 12.65, 115.0, 90.0)
+    janelas = analise.janelas()
+    assert janelas[0][1] == 1 and janelas[-1][2] == 800
+    assert [inicio for _, inicio, _ in janelas[1:]] == [dia for dia, _, _ in analise.cruzamentos()]
+    assert {produto for produto, _, _ in janelas} >= {"cdb", "lci"}
+
+    # Janelas contíguas, sem sobreposição
+    assert all(b[1] == a[2] + 1 for a, b in zip(janelas, janelas[1:]))
+    for produto, inicio, fim in janelas:
+        for dia in range(inicio, fim + 1):
+            liquido = analise.no_dia(dia)
+            assert liquido[produto] == max(liquido.values()), (produto, dia)
+
+
+def test_prazo_invalido():
+    with pytest.raises(ValueError):
+        analisar_resgates(1000.0, 0, 12.65, 110.0, 90.0)
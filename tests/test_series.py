@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pytest
+
+from rendafixa.series import lttb, saldo_diario
+
+
+def _lttb_referencia(x: list, y: list, limite: int) -> list:
+    """Implementação direta do algoritmo de Steinarsson, ponto a ponto"""
+    n = len(x)
+    tamanho = (n - 2) / (limite - 2)
+    a, ids = 0, [0]
+    for i in range(limite - 2):
+        inicio_media = math.floor((i + 1) * tamanho) + 1
+        fim_media = min(math.floor((i + 2) * tamanho) + 1, n)
+        media_x = sum(x[inicio_media:fim_media]) / (fim_media - inicio_media)
+        media_y = sum(y[inicio_media:fim_media]) / (fim_media - inicio_media)
+
+        maior, escolhido = -1.0, None
+        for j in range(math.floor(i * tamanho) + 1, math.floor((i + 1) * tamanho) + 1):
+            area = abs((x[a] - media_x) * (y[j] - y[a]) - (x[a] - x[j]) * (media_y - y[a]))
+            if area > maior:
+                maior, escolhido = area, j
+        ids.append(escolhido)
+        a = escolhido
+    return ids + [n - 1]
+
+
+@pytest.mark.parametrize("n, limite", [(10, 3), (1000, 300), (3651, 300), (18251, 300), (301, 300)])
+def test_lttb_igual_a_referencia(n, limite):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=n))
+    rx, ry = lttb(x, y, limite)
+    ids = _lttb_referencia(x.tolist(), y.tolist(), limite)
+    np.testing.assert_array_equal(rx, x[ids])
+    np.testing.assert_array_equal(ry, y[ids])
+
+
+def test_lttb_mantem_extremos_e_ordem():
+    t, series = saldo_diario(1000.0, 3650, 12.65, 110.0, 90.0)
+    for saldos in series.values():
+        x, y = lttb(t, saldos, 300)
+        assert len(x) == 300
+        assert (x[0], x[-1]) == (0, 3650)
+        assert np.all(np.diff(x) > 0)
+
+
+@pytest.mark.parametrize("limite", [2, 11, 50])
+def test_lttb_sem_reducao(limite):
+    x = np.arange(11.0)
+    rx, ry = lttb(x, x ** 2, limite)
+    assert rx is x and len(ry) == 11
+
+
+def test_saldo_diario_da_poupanca_so_muda_nos_aniversarios():
+    t, series = saldo_diario(1000.0, 95, 12.65, 110.0, 90.0)
+    assert len(t) == 96
+    mudancas = np.flatnonzero(np.diff(series["poupanca"])) + 1
+    assert mudancas.tolist() == [30, 60, 90]
+    assert np.all(np.diff(series["cdb"]) > 0)
@@ -0,0 +1,97 @@
+import numpy as np
+
+from rendafixa.motores import simular_lote
+from rendafixa.snapshots import SimulationSnapshot, criar_snapshot, diff_snapshots, salvar_snapshot
+from rendafixa.tributos import regras_vigentes
+
+VERSAO_TAXAS = "2024-06-01-teste"
+
+
+def _criar(path, *entradas, **kwargs):
+    criar_snapshot(str(path), *entradas, versao_taxas=VERSAO_TAXAS, **kwargs)
+    return SimulationSnapshot(str(path))
+
+
+def test_grava_e_le_colunas(tmp_path):
+    valores = np.array([1000.0, 2500.5, 10_000.0])
+    dias = np.array([15, 365, 800])
+    with _criar(tmp_path / "a.npz", valores, dias, 12.65, 110.0, 92.0, descricao="teste") as snapshot:
+        assert len(snapshot) == 3
+        assert snapshot.meta["versao_regras"] == regras_vigentes().versao
+        assert snapshot.meta["versao_taxas"] == VERSAO_TAXAS
+        assert snapshot.meta["descricao"] == "teste"
+        np.testing.assert_array_equal(snapshot.entrada("dias"), dias)
+        np.testing.assert_array_equal(snapshot.entrada("di"), [12.65] * 3)
+
+        esperado = simular_lote(valores, dias, 12.65, 110.0, 92.0)
+        for produto, campos in esperado.items():
+            assert set(snapshot.campos(produto)) == set(campos)
+            for campo, valores_campo in campos.items():
+                np.testing.assert_array_equal(snapshot.resultado(produto, campo), np.broadcast_to(valores_campo, (3,)))
+
+        linhas = snapshot.linhas(1, 2)
+        assert linhas["entradas"]["valor"].tolist() == [2500.5]
+        assert linhas["cdb"]["total_amount"].tolist() == [esperado["cdb"]["total_amount"][1]]
+
+
+def test_entradas_escalares_com_broadcasting(tmp_path):
+    # Varredura de prazos com valor escalar
+    with _criar(tmp_path / "prazos.npz", 1000.0, np.arange(1, 400), 12.65, 100, 90) as snapshot:
+        assert len(snapshot) == 399
+        np.testing.assert_array_equal(snapshot.entrada("valor"), np.full(399, 1000.0))
+        np.testing.assert_array_equal(snapshot.entrada("dias"), np.arange(1, 400))
+        assert snapshot.resultado("lci", "total_amount").shape == (399,)
+
+
+def test_diff_identicos_em_outra_ordem_com_repetidos(tmp_path):
+    valores = np.array([1000.0, 1000.0, 5000.0])
+    dias = np.array([360, 360, 90])
+    ordem = [2, 0, 1]
+    with _criar(tmp_path / "a.npz", valores, dias, 12.65, 110.0, 92.0) as a, \
+            _criar(tmp_path / "b.npz", valores[ordem], dias[ordem], 12.65, 110.0, 92.0) as b:
+        diff = diff_snapshots(a, b)
+    assert diff.linhas_comparadas == 3
+    assert diff.apenas_a == 0 and diff.apenas_b == 0
+    assert diff.identicos
+
+
+def test_diff_aponta_divergencias_e_cenarios_ausentes(tmp_path):
+    valores = np.array([1000.0, 2000.0, 3000.0])
+    dias = np.array([10, 200, 800])
+    entradas = dict(valor=valores, dias=dias, di=12.65, taxa_cdb=110.0, taxa_lci=90.0)
+    resultados = simular_lote(valores, dias, 12.65, 110.0, 90.0)
+    salvar_snapshot(str(tmp_path / "a.npz"), entradas, resultados, "v1", VERSAO_TAXAS)
+
+    alterados = {p: {c: np.array(np.broadcast_to(v, (3,))) for c, v in r.items()} for p, r in resultados.items()}
+    alterados["cdb"]["total_amount"][1] += 0.02
+    salvar_snapshot(str(tmp_path / "b.npz"), entradas, alterados, "v2", VERSAO_TAXAS)
+
+    with SimulationSnapshot(str(tmp_path / "a.npz")) as a, SimulationSnapshot(str(tmp_path / "b.npz")) as b:
+        diff = diff_snapshots(a, b)
+    assert diff.versoes["versao_regras"] == ("v1", "v2")
+    assert diff.campos[("cdb", "total_amount")]["divergentes"] == 1
+    assert diff.campos[("cdb", "total_amount")]["exemplos"] == [1]
+    assert not diff.identicos
+
+    # Um cenário a menos em b e um repetido a mais em a
+    with _criar(tmp_path / "c.npz", valores[[0, 0, 1]], dias[[0, 0, 1]], 12.65, 110.0, 90.0) as c, \
+            _criar(tmp_path / "d.npz", valores[[0, 1]], dias[[0, 1]], 12.65, 110.0, 90.0) as d:
+        diff = diff_snapshots(c, d)
+    assert (diff.linhas_comparadas, diff.apenas_a, diff.apenas_b) == (2, 1, 0)
+
+
+def test_reexecucao_reproduz_o_snapshot(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 500
+    with _criar(
+        tmp_path / "original.npz",
+        np.round(rng.uniform(100, 1e6, n), 2), rng.integers(1, 3650, n),
+        np.round(rng.uniform(2, 15, n), 2), np.round(rng.uniform(80, 130, n), 1), 95.0,
+    ) as original:
+        original.reexecutar(str(tmp_path / "reexecucao.npz"))
+        with SimulationSnapshot(str(tmp_path / "reexecucao.npz")) as reexecucao:
+            assert reexecucao.meta["versao_regras"] == original.meta["versao_regras"]
+            assert reexecucao.meta["versao_taxas"] == VERSAO_TAXAS
+            diff = diff_snapshots(original, reexecucao, tolerancia=0)
+    assert diff.identicos
+    assert diff.linhas_comparadas == n
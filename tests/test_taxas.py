@@ -0,0 +1,149 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+import time
+
+import pytest
+
+from rendafixa.taxas import (
+    SNAPSHOT_PADRAO, FileRateProvider, HttpRateProvider, RateCache, RateProvider,
+    RateSnapshot, provider_from_source,
+)
+
+
+def _escrever(path, **dados):
+    path.write_text(json.dumps(dados), encoding="utf-8")
+    return str(path)
+
+
+class _Fixo(RateProvider):
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.chamadas = 0
+
+    def fetch(self) -> RateSnapshot:
+        self.chamadas += 1
+        item = self.snapshots[min(self.chamadas, len(self.snapshots)) - 1]
+        if isinstance(item, Exception):
+            raise item
+        return RateSnapshot(di=item[0], selic=item[1], data=item[2], fonte="teste", obtido_em=time.time())
+
+
+def _aguardar(condicao, timeout=5.0):
+    limite = time.time() + timeout
+    while not condicao():
+        assert time.time() < limite, "condição não atendida a tempo"
+        time.sleep(0.01)
+
+
+def test_file_provider(tmp_path):
+    fonte = _escrever(tmp_path / "taxas.json", di=10.4, selic=10.5, data="2024-06-01")
+    snapshot = FileRateProvider(fonte).fetch()
+    assert (snapshot.di, snapshot.selic, snapshot.data, snapshot.fonte) == (10.4, 10.5, "2024-06-01", fonte)
+    assert snapshot.versao.startswith("2024-06-01-")
+
+
+@pytest.mark.parametrize("dados", [
+    {"di": 10.4, "selic": 10.5, "data": "01/06/2024"},
+    {"di": 10.4, "data": "2024-06-01"},
+    {"di": "dez", "selic": 10.5},
+])
+def test_file_provider_rejeita_dados_invalidos(tmp_path, dados):
+    fonte = _escrever(tmp_path / "taxas.json", **dados)
+    with pytest.raises(ValueError):
+        FileRateProvider(fonte).fetch()
+
+
+def test_http_provider():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            corpo = json.dumps({"di": 11.0, "selic": 11.25, "data": "2024-07-01"}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{servidor.server_port}/taxas"
+        provider = provider_from_source(url)
+        assert isinstance(provider, HttpRateProvider)
+        assert (provider.fetch().di, provider.fetch().selic) == (11.0, 11.25)
+    finally:
+        servidor.shutdown()
+
+
+def test_sem_fonte_usa_padrao(tmp_path):
+    cache = RateCache(None, str(tmp_path / "cache.json"))
+    assert cache.atual() == SNAPSHOT_PADRAO
+    with pytest.raises(ValueError):
+        cache.atualizar()
+
+
+def test_snapshot_em_disco_e_compartilhado(tmp_path):
+    caminho = str(tmp_path / "cache.json")
+    RateCache(_Fixo((10.0, 10.25, "2024-05-01")), caminho).atualizar()
+
+    provider = _Fixo((1.0, 1.0, "2000-01-01"))
+    cache = RateCache(provider, caminho, ttl=3600)
+    for _ in range(1000):  # um lote lê o mesmo snapshot sem consultar a fonte
+        assert cache.atual().di == 10.0
+    assert provider.chamadas == 0
+
+
+def test_cache_invalido_em_disco_e_ignorado(tmp_path):
+    caminho = tmp_path / "cache.json"
+    caminho.write_text(json.dumps({"di": 10.0, "selic": 10.0, "data": "01/06/2024", "fonte": "x", "obtido_em": 0}))
+    assert RateCache(None, str(caminho)).atual() == SNAPSHOT_PADRAO
+    caminho.write_text("{corrompido")
+    assert RateCache(None, str(caminho)).atual() == SNAPSHOT_PADRAO
+
+
+def test_expirado_atualiza_em_segundo_plano_e_notifica(tmp_path):
+    cache = RateCache(_Fixo((10.4, 10.5, "2024-06-01")), str(tmp_path / "cache.json"), ttl=60)
+    recebidos = []
+    cache.on_update(recebidos.append)
+
+    assert cache.atual() == SNAPSHOT_PADRAO
+    _aguardar(lambda: recebidos)
+    assert recebidos[0].di == 10.4
+    assert cache.atual().di == 10.4
+    assert RateCache(None, str(tmp_path / "cache.json")).atual().di == 10.4
+
+
+def test_falha_na_fonte_mantem_snapshot(tmp_path):
+    provider = _Fixo((10.4, 10.5, "2024-06-01"), OSError("fonte fora do ar"))
+    cache = RateCache(provider, str(tmp_path / "cache.json"), ttl=0)
+    cache.atualizar()
+    with pytest.raises(OSError):
+        cache.atualizar()
+    assert isinstance(cache.ultimo_erro, OSError)
+    assert cache.atual().di == 10.4
+
+
+def test_mesma_versao_nao_notifica(tmp_path):
+    cache = RateCache(_Fixo((10.4, 10.5, "2024-06-01")), None)
+    recebidos = []
+    cache.on_update(recebidos.append)
+    cache.atualizar()
+    cache.atualizar()
+    assert len(recebidos) == 1
+
+
+def test_verificacao_periodica_de_ttl(tmp_path):
+    provider = _Fixo((10.4, 10.5, "2024-06-01"), (10.9, 11.0, "2024-06-02"))
+    cache = RateCache(provider, None, ttl=0.05)
+    recebidos = []
+    cache.on_update(recebidos.append)
+    cache.atualizar()
+    try:
+        cache.iniciar_verificacao(intervalo=0.02)
+        cache.iniciar_verificacao(intervalo=0.02)  # idempotente
+        _aguardar(lambda: len(recebidos) == 2)
+        assert recebidos[-1].di == 10.9
+    finally:
+        cache.parar_verificacao()
@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+
+from rendafixa.tributos import REGRAS_PADRAO, TaxRuleBook
+
+IOF = ", ".join(str(p) for p in range(96, 6, -3))  # 30 alíquotas
+
+
+def _versao(id_: str, vigencia: str, faixas: str, iof: str = IOF, produtos=("poupanca", "cdb", "lci")) -> str:
+    texto = f"""
+[[versao]]
+id = "{id_}"
+vigencia = {vigencia}
+
+[versao.ir]
+faixas = {faixas}
+demais = 15.0
+
+[versao.iof]
+tabela = [{iof}]
+"""
+    for nome in produtos:
+        isento = "false" if nome != "cdb" else "true"
+        texto += f"\n[versao.produtos.{nome}]\nir = {isento}\niof = {isento}\n"
+    return texto
+
+
+def _carregar(tmp_path, *versoes) -> TaxRuleBook:
+    caminho = tmp_path / "regras.toml"
+    caminho.write_text("".join(versoes), encoding="utf-8")
+    return TaxRuleBook.load(str(caminho))
+
+
+@pytest.fixture
+def livro(tmp_path):
+    # A versão mais nova vem primeiro no arquivo; a ordem é dada pela vigência
+    return _carregar(
+        tmp_path,
+        _versao("2030.1", "2030-07-01", "[[360, 25.0]]"),
+        _versao("2005.1", "2005-01-01", "[[180, 22.5], [360, 20.0], [720, 17.5]]"),
+    )
+
+
+def test_arquivo_padrao():
+    livro = TaxRuleBook.load(REGRAS_PADRAO)
+    regras = livro.vigente(date(2024, 6, 1))
+    assert regras.ir(180) == 22.5 and regras.ir(181) == 20.0 and regras.ir(721) == 15.0
+    assert regras.iof(1) == 96 and regras.iof(30) == 0 and regras.iof(31) == 0
+
+
+@pytest.mark.parametrize("data, versao", [
+    (date(2005, 1, 1), "2005.1"),
+    (date(2030, 6, 30), "2005.1"),
+    (date(2030, 7, 1), "2030.1"),
+    (date(2030, 7, 2), "2030.1"),
+    (date(2099, 1, 1), "2030.1"),
+])
+def test_vigente_pela_data(livro, data, versao):
+    assert livro.vigente(data).versao == versao
+
+
+def test_sem_regra_antes_da_primeira_vigencia(livro):
+    with pytest.raises(ValueError, match="31/12/2004"):
+        livro.vigente(date(2004, 12, 31))
+
+
+def test_por_versao(livro):
+    assert livro.por_versao("2005.1").ir(200) == 20.0
+    assert livro.por_versao("2030.1").ir(200) == 25.0
+    assert livro.por_versao("2030.1").ir(361) == 15.0
+    with pytest.raises(ValueError, match="desconhecida"):
+        livro.por_versao("1999.1")
+
+
+@pytest.mark.parametrize("versao, mensagem", [
+    (_versao("2030.1", "2030-07-01T00:00:00", "[[360, 25.0]]"), "vigencia"),
+    (_versao("2030.1", '"2030-07-01"', "[[360, 25.0]]"), "vigencia"),
+    (_versao("2030.1", "2030-07-01", "[[360, 25.0]]", produtos=("poupanca", "cdb")), "lci"),
+    (_versao("2030.1", "2030-07-01", "[[360, 25.0]]", iof="96, 93"), "IOF"),
+    (_versao("2030.1", "2030-07-01", "[[360, 25.0], [180, 20.0]]"), "ordem crescente"),
+    (_versao("2005.1", "2030-07-01", "[[360, 25.0]]"), "repetido"),
+    (_versao("2030.1", "2030-07-01", "[[360, 25.0]]").replace("demais = 15.0\n", ""), "demais"),
+])
+def test_arquivo_invalido_identifica_a_versao(tmp_path, versao, mensagem):
+    valida = _versao("2005.1", "2005-01-01", "[[180, 22.5]]")
+    with pytest.raises(ValueError, match=mensagem) as erro:
+        _carregar(tmp_path, valida, versao)
+    assert str(erro.value).startswith(f"Regras {'2005.1' if mensagem == 'repetido' else '2030.1'}")
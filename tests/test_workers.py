@@ -0,0 +1,162 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from rendafixa.calculadora import PRODUTOS, simular
+from rendafixa.workers import PoolBusyError, SessionWorkerPool
+
+TIMEOUT = 5.0
+
+
+def _aguardar(condicao, timeout=TIMEOUT):
+    limite = time.time() + timeout
+    while not condicao():
+        assert time.time() < limite, "condição não atendida a tempo"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def criar_pool():
+    pools = []
+
+    def criar(**kwargs):
+        pool = SessionWorkerPool(**kwargs)
+        pools.append(pool)
+        return pool
+
+    yield criar
+    for pool in pools:
+        pool.shutdown()
+
+
+def _ocupar(pool, sessao="bloqueio") -> threading.Event:
+    """Ocupa um worker até o evento retornado ser sinalizado"""
+    iniciou, liberar = threading.Event(), threading.Event()
+
+    def tarefa():
+        iniciou.set()
+        liberar.wait(TIMEOUT)
+
+    pool.submit(sessao, tarefa)
+    assert iniciou.wait(TIMEOUT)
+    return liberar
+
+
+def test_rodizio_entre_sessoes(criar_pool):
+    pool = criar_pool(max_workers=1, max_pending_per_session=3)
+    liberar = _ocupar(pool)
+    ordem = []
+    futuros = [
+        pool.submit(sessao, ordem.append, f"{sessao}{i}")
+        for sessao in ("a", "b") for i in range(1, 4)
+    ]
+    liberar.set()
+    for futuro in futuros:
+        futuro.result(TIMEOUT)
+    # Todas as tarefas de "a" foram enviadas antes das de "b", mas as sessões se alternam
+    assert ordem == ["a1", "b1", "a2", "b2", "a3", "b3"]
+
+
+def test_uma_tarefa_por_sessao_em_execucao(criar_pool):
+    pool = criar_pool(max_workers=4)
+    liberar = _ocupar(pool, "s")
+    segunda = threading.Event()
+    futuro = pool.submit("s", segunda.set)
+
+    # Com workers livres, outra sessão é atendida enquanto a segunda tarefa de "s" espera
+    pool.submit("outra", lambda: None).result(TIMEOUT)
+    _aguardar(lambda: pool.stats()["running"] == 1)
+    assert not segunda.is_set()
+    assert pool.stats()["pending"] == 1
+
+    liberar.set()
+    futuro.result(TIMEOUT)
+    assert segunda.is_set()
+
+
+def test_recusa_por_sessao(criar_pool):
+    pool = criar_pool(max_workers=1, max_pending_per_session=2)
+    liberar = _ocupar(pool)
+    pool.submit("s", lambda: None)
+    pool.submit("s", lambda: None)
+    with pytest.raises(PoolBusyError):
+        pool.submit("s", lambda: None)
+    # A fila cheia de uma sessão não afeta as demais
+    outra = pool.submit("outra", lambda: "ok")
+    assert pool.stats()["rejected"] == 1
+
+    liberar.set()
+    assert outra.result(TIMEOUT) == "ok"
+
+
+def test_recusa_global(criar_pool):
+    pool = criar_pool(max_workers=1, max_pending_per_session=10, max_pending=3)
+    liberar = _ocupar(pool)
+    futuros = [pool.submit(sessao, lambda: None) for sessao in ("a", "b", "c")]
+    with pytest.raises(PoolBusyError):
+        pool.submit("d", lambda: None)
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["sessions_waiting"] == 3
+
+    liberar.set()
+    for futuro in futuros:
+        futuro.result(TIMEOUT)
+    pool.submit("d", lambda: None).result(TIMEOUT)
+
+
+def test_mesma_chave_substitui_a_pendente(criar_pool):
+    pool = criar_pool(max_workers=1)
+    liberar = _ocupar(pool, "s")
+    executadas = []
+    antiga = pool.submit("s", executadas.append, "antiga", chave="calcular")
+    sem_chave = pool.submit("s", executadas.append, "sem chave")
+    outra_chave = pool.submit("s", executadas.append, "outra chave", chave="registrar")
+    nova = pool.submit("s", executadas.append, "nova", chave="calcular")
+    # A chave só substitui tarefas da mesma sessão
+    outra_sessao = pool.submit("t", executadas.append, "outra sessão", chave="calcular")
+
+    assert antiga.cancelled()
+    assert pool.stats()["pending"] == 4
+    liberar.set()
+    for futuro in (sem_chave, outra_chave, nova, outra_sessao):
+        futuro.result(TIMEOUT)
+    assert sorted(executadas) == sorted(["sem chave", "outra chave", "nova", "outra sessão"])
+    # A substituta entra no fim da fila da sessão
+    assert [e for e in executadas if e != "outra sessão"] == ["sem chave", "outra chave", "nova"]
+
+
+def test_cancel_session(criar_pool):
+    pool = criar_pool(max_workers=1)
+    liberar = _ocupar(pool)
+    executadas = []
+    canceladas = [pool.submit("s", executadas.append, i) for i in range(3)]
+    mantida = pool.submit("t", executadas.append, "t")
+
+    pool.cancel_session("s")
+    assert all(f.cancelled() for f in canceladas)
+    assert pool.stats()["pending"] == 1
+
+    liberar.set()
+    mantida.result(TIMEOUT)
+    _aguardar(lambda: pool.stats()["running"] == 0)
+    assert executadas == ["t"]
+
+
+def test_resultados_iguais_a_simular(criar_pool):
+    rng = np.random.default_rng(7)
+    amostra = [
+        (float(np.round(rng.uniform(1, 1e6), 2)), int(d), float(np.round(rng.uniform(1, 20), 2)), 105.0, 90.0)
+        for d in rng.integers(1, 3651, 400)
+    ]
+    pool = criar_pool(max_workers=4, max_pending_per_session=len(amostra), max_pending=len(amostra))
+    futuros = [
+        (cenario, pool.submit(f"sessao-{i % 8}", simular, *cenario))
+        for i, cenario in enumerate(amostra)
+    ]
+    for cenario, futuro in futuros:
+        referencia = simular(*cenario)
+        resultado = futuro.result(timeout=30)
+        for produto in PRODUTOS:
+            assert resultado[produto] == referencia[produto]